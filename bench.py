@@ -0,0 +1,254 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from fixture_site import FixtureSite
+from utils import print_info
+
+
+# Benchmarks against the offline FixtureSite. Every bench returns a flat dict of numbers so
+# runs can be diffed (`--json`) across branches or settings.
+
+
+@contextlib.contextmanager
+def _quiet(enabled: bool = True):
+    """Swallow the per-file [INFO] lines while timing."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _max_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if os.uname().sysname == "Darwin" else rss / 1024
+
+
+def bench_resolver(site: FixtureSite, warm: bool = True) -> Dict[str, float]:
+    """Viewer URL -> PDF URL resolutions per second, cold (HTTP) and, optionally, from the memo."""
+    from resolver import ViewerResolver
+
+    viewer_urls = [
+        site.viewer_url(year, num)
+        for _, _, years in site.decades
+        for year in years
+        for num in range(1, site.issues_per_year + 1)
+    ]
+    resolver = ViewerResolver()
+    before = site.counters.get("viewer", 0)
+    start = time.perf_counter()
+    resolved = sum(1 for url in viewer_urls if resolver.resolve(url))
+    cold = time.perf_counter() - start
+    result = {
+        "viewer_mode": site.viewer_mode,
+        "resolutions": len(viewer_urls),
+        "resolved": resolved,
+        "viewer_fetches": site.counters.get("viewer", 0) - before,
+        "cold_per_sec": round(len(viewer_urls) / cold, 1) if cold else 0.0,
+    }
+    if warm:
+        start = time.perf_counter()
+        for url in viewer_urls:
+            resolver.resolve(url)
+        hot = time.perf_counter() - start
+        result["cached_per_sec"] = round(len(viewer_urls) / hot, 1) if hot else 0.0
+    return result
+
+
+def bench_download(
+    site: FixtureSite, workers: int, per_host: int, segment_size: Optional[int] = None, quiet: bool = True,
+) -> Dict[str, float]:
+    """Throughput and memory of one full download of the fixture into an empty directory."""
+    from downloader import download_all_pdfs
+
+    structure = site.expected_structure()
+    files = sum(len(items) for years in structure.values() for items in years.values())
+    throttled_before = site.counters.get("pdf_throttled", 0)
+    out_dir = tempfile.mkdtemp(prefix="gazette-bench-")
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        with _quiet(quiet):
+            download_all_pdfs(structure, out_dir, workers=workers, per_host=per_host, segment_size=segment_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        saved = 0
+        saved_bytes = 0
+        for root, dirs, names in os.walk(out_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in names:
+                if name.endswith(".pdf"):
+                    saved += 1
+                    saved_bytes += os.path.getsize(os.path.join(root, name))
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    return {
+        "workers": workers,
+        "per_host": per_host,
+        "segment_size": segment_size or 0,
+        "files": files,
+        "saved": saved,
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(saved / elapsed, 2) if elapsed else 0.0,
+        "mb_per_sec": round(saved_bytes / elapsed / (1024 * 1024), 2) if elapsed else 0.0,
+        "throttled": site.counters.get("pdf_throttled", 0) - throttled_before,
+        "py_peak_mb": round(peak / (1024 * 1024), 2),
+        "max_rss_mb": round(_max_rss_mb(), 1),
+    }
+
+
+def bench_revalidate(site: FixtureSite, workers: int, per_host: int, changed: int = 1, quiet: bool = True) -> Dict[str, float]:
+    """Freshness check of a complete mirror after the site revised `changed` issues."""
+    from downloader import download_all_pdfs, revalidate_pdfs
+
+    out_dir = tempfile.mkdtemp(prefix="gazette-bench-")
+    try:
+        with _quiet(quiet):
+            download_all_pdfs(site.expected_structure(), out_dir, workers=workers, per_host=per_host)
+        revised = [(year, 1) for _, _, years in site.decades for year in years][:changed]
+        for year, num in revised:
+            site.revise(year, num)
+        bytes_before = site.counters.get("pdf_bytes", 0)
+        start = time.perf_counter()
+        with _quiet(quiet):
+            counts = revalidate_pdfs(out_dir, workers=workers, per_host=per_host)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    checked = sum(counts.values())
+    return {
+        "workers": workers,
+        "checked": checked,
+        "updated": counts["updated"],
+        "failed": counts["failed"],
+        "seconds": round(elapsed, 3),
+        "checks_per_sec": round(checked / elapsed, 1) if elapsed else 0.0,
+        "body_bytes": site.counters.get("pdf_bytes", 0) - bytes_before,
+    }
+
+
+def bench_crawl(site: FixtureSite, workers: int, backend: str = "auto", quiet: bool = True) -> Dict[str, object]:
+    """Crawl of the fixture (the browser backend needs Chrome). Reports per-year seconds and correctness."""
+    from crawler import get_gazette_structure
+    from timing import StepTimer
+
+    timer = StepTimer()
+    start = time.perf_counter()
+    with _quiet(quiet):
+        structure = get_gazette_structure(site.base_url, site.decades, workers=workers, timer=timer, backend=backend)
+    elapsed = time.perf_counter() - start
+    if not any(items for years in structure.values() for items in years.values()):
+        raise RuntimeError(f"{backend} crawl found nothing (is Chrome available?)")
+
+    summary = timer.summary()
+    overall = summary.pop("__all__")
+    per_year = {key: round(sum(step["total"] for step in steps.values()), 3) for key, steps in sorted(summary.items())}
+    resolution = overall.get("viewer_resolution", {"total": 0.0, "count": 0})
+    return {
+        "backend": backend,
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "correct": structure == site.expected_structure(),
+        "per_year_seconds": per_year,
+        "steps_seconds": {name: stats["total"] for name, stats in overall.items()},
+        "resolutions_per_sec": round(resolution["count"] / resolution["total"], 1) if resolution["total"] else 0.0,
+    }
+
+
+def _parse_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the gazette crawler and downloader.")
+    parser.add_argument("--suite", default="resolve,download", help="comma list of: resolve, download, revalidate, crawl")
+    parser.add_argument("--years", type=int, default=3, help="years in the fixture (starting at 2000)")
+    parser.add_argument("--issues", type=int, default=12, help="issues per year")
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024, help="bytes per synthetic PDF")
+    parser.add_argument("--latency", type=float, default=0.05, help="server seconds before each PDF response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of PDF requests answered 503")
+    parser.add_argument("--throttle-above", type=int, help="fixture answers 429 beyond this many concurrent PDF requests")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with each 429")
+    parser.add_argument("--bandwidth", type=float, help="fixture bytes per second per PDF response")
+    parser.add_argument("--viewer-mode", choices=("query", "html", "js"), default="html")
+    parser.add_argument("--workers", default="1,4,8", help="download worker counts to compare")
+    parser.add_argument("--per-host", type=int, default=8)
+    parser.add_argument("--segment-sizes", default="0", help="range segment sizes in bytes to compare (0 = whole files)")
+    parser.add_argument("--crawl-workers", default="1,4", help="crawl worker counts to compare (crawl suite)")
+    parser.add_argument("--crawl-backends", default="http,browser", help="comma list of: auto, http, browser")
+    parser.add_argument("--listing-mode", choices=("embedded", "ajax", "opaque"), default="embedded")
+    parser.add_argument("--year-pages", action="store_true", help="fixture also serves server-rendered year listings")
+    parser.add_argument("--json", dest="json_path", help="also write results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="do not silence [INFO] output")
+    args = parser.parse_args()
+
+    suites = {s.strip() for s in args.suite.split(",") if s.strip()}
+    by_decade: Dict[int, List[int]] = {}
+    for year in range(2000, 2000 + args.years):
+        by_decade.setdefault(year // 10 * 10, []).append(year)
+    decades = [(f"{code}s", str(code), years) for code, years in sorted(by_decade.items())]
+    results: Dict[str, List[Dict[str, object]]] = {}
+
+    with FixtureSite(
+        decades=decades,
+        issues_per_year=args.issues,
+        pdf_size=args.pdf_size,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        throttle_above=args.throttle_above,
+        retry_after=args.retry_after,
+        bandwidth=args.bandwidth,
+        viewer_mode=args.viewer_mode,
+        listing_mode=args.listing_mode,
+        year_pages=args.year_pages,
+    ) as site:
+        print_info(f"Fixture site at {site.base_url}")
+        if "resolve" in suites:
+            results["resolve"] = [bench_resolver(site)]
+            print_info(f"resolve: {results['resolve'][0]}")
+        if "download" in suites:
+            results["download"] = []
+            for segment_size in _parse_ints(args.segment_sizes):
+                for workers in _parse_ints(args.workers):
+                    row = bench_download(site, workers, args.per_host, segment_size or None, quiet=not args.verbose)
+                    results["download"].append(row)
+                    print_info(f"download: {row}")
+        if "revalidate" in suites:
+            results["revalidate"] = []
+            for workers in _parse_ints(args.workers):
+                row = bench_revalidate(site, workers, args.per_host, quiet=not args.verbose)
+                results["revalidate"].append(row)
+                print_info(f"revalidate: {row}")
+        if "crawl" in suites:
+            results["crawl"] = []
+            for backend in (b.strip() for b in args.crawl_backends.split(",") if b.strip()):
+                for workers in _parse_ints(args.crawl_workers):
+                    try:
+                        row = bench_crawl(site, workers, backend, quiet=not args.verbose)
+                    except Exception as e:
+                        print_info(f"crawl ({backend}): skipped ({type(e).__name__}: {e})")
+                        break
+                    results["crawl"].append(row)
+                    print_info(f"crawl: {row}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print_info(f"Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
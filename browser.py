@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.request import urlopen
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+
+from utils import print_info
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gazette-scraper")
+DRIVER_PATH_CACHE = os.path.join(CACHE_DIR, "chromedriver.json")
+# Re-run webdriver_manager at most this often; a browser upgrade in between shows up as a
+# session error, after which the cached path is dropped and resolved again
+DRIVER_PATH_MAX_AGE = 7 * 24 * 3600
+# Warm-session mode: slot i listens on REUSE_BASE_PORT + i with its own profile directory
+REUSE_BASE_PORT = 9333
+
+# URL patterns Chrome refuses to fetch when resource blocking is on (cover thumbnails, fonts, media)
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg",
+]
+
+_driver_path_lock = threading.Lock()
+_driver_path: Optional[str] = None
+
+
+def driver_path(refresh: bool = False) -> str:
+    """
+    Path to a chromedriver binary. Order: $CHROMEDRIVER_PATH, the in-process memo, the on-disk
+    cache (if fresh and the file still exists), and only then ChromeDriverManager().install(),
+    whose result is cached for later runs.
+    """
+    global _driver_path
+    env_path = os.environ.get("CHROMEDRIVER_PATH")
+    if env_path:
+        return env_path
+    with _driver_path_lock:
+        if _driver_path and not refresh and os.path.exists(_driver_path):
+            return _driver_path
+        if not refresh:
+            try:
+                with open(DRIVER_PATH_CACHE, "r", encoding="utf-8") as f:
+                    cached = json.load(f)
+                if os.path.exists(cached["path"]) and time.time() - float(cached["resolved_at"]) < DRIVER_PATH_MAX_AGE:
+                    _driver_path = cached["path"]
+                    return _driver_path
+            except Exception:
+                pass
+
+        # Imported lazily: a cached path means webdriver_manager is never loaded at all
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        _driver_path = ChromeDriverManager().install()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(DRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+            json.dump({"path": _driver_path, "resolved_at": time.time()}, f)
+        return _driver_path
+
+
+def _debugger_alive(address: str) -> bool:
+    try:
+        with urlopen(f"http://{address}/json/version", timeout=1) as resp:
+            return resp.status == 200
+    except Exception:
+        return False
+
+
+def _options(headless: bool, block_resources: bool, page_load_strategy: str) -> Options:
+    options = Options()
+    if headless:
+        options.add_argument("--headless=new")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--window-size=1920,1080")
+    options.page_load_strategy = page_load_strategy
+    if block_resources:
+        prefs: Dict[str, int] = {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.managed_default_content_settings.media_stream": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        }
+        options.add_experimental_option("prefs", prefs)
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_argument("--autoplay-policy=user-gesture-required")
+    return options
+
+
+def build_driver(
+    headless: bool = True,
+    block_resources: bool = True,
+    page_load_strategy: str = "eager",
+    reuse_slot: Optional[int] = None,
+) -> webdriver.Chrome:
+    """
+    Shared Chrome factory for the crawler.
+
+    - The chromedriver path is resolved once and cached on disk (see driver_path).
+    - block_resources turns off images and media through Chrome prefs and blocks image, font
+      and media URLs through CDP, so card covers and web fonts are never fetched.
+    - page_load_strategy "eager" returns from driver.get() at DOMContentLoaded; the crawler
+      waits for the elements it needs itself.
+    - reuse_slot keeps a warm browser across runs: the first run launches a detached Chrome
+      with remote debugging on REUSE_BASE_PORT + slot and a persistent profile; later runs
+      attach to it. Pair with release_driver() so the browser is left running.
+    Startup time is logged.
+    """
+    start = time.perf_counter()
+    reused = False
+    if reuse_slot is not None:
+        address = f"127.0.0.1:{REUSE_BASE_PORT + reuse_slot}"
+        if _debugger_alive(address):
+            # Launch flags no longer apply to a running browser, but the load strategy is per session
+            options = Options()
+            options.page_load_strategy = page_load_strategy
+            options.debugger_address = address
+            reused = True
+        else:
+            options = _options(headless, block_resources, page_load_strategy)
+            options.add_argument(f"--remote-debugging-port={REUSE_BASE_PORT + reuse_slot}")
+            options.add_argument(f"--user-data-dir={os.path.join(CACHE_DIR, f'profile-{reuse_slot}')}")
+            options.add_experimental_option("detach", True)
+    else:
+        options = _options(headless, block_resources, page_load_strategy)
+
+    try:
+        driver = webdriver.Chrome(service=Service(driver_path()), options=options)
+    except Exception:
+        # A stale cached chromedriver (e.g. Chrome was upgraded): resolve again and retry once
+        driver = webdriver.Chrome(service=Service(driver_path(refresh=True)), options=options)
+
+    if block_resources:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print_info(f"Resource blocking via CDP unavailable: {e}")
+
+    elapsed = time.perf_counter() - start
+    print_info(f"Browser ready in {elapsed:.2f}s" + (" (reused warm session)" if reused else ""))
+    return driver
+
+
+def release_driver(driver: webdriver.Chrome, keep_warm: bool = False) -> None:
+    """Quit the browser, or with keep_warm only stop chromedriver so the browser stays up for the next run."""
+    try:
+        if keep_warm:
+            # Leave a single blank tab behind, then drop chromedriver without ending the session
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+            driver.service.stop()
+        else:
+            driver.quit()
+    except Exception:
+        pass
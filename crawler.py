@@ -1,28 +1,24 @@
+import queue
+import threading
 import time
-from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.common.exceptions import TimeoutException
 
+from browser import build_driver, release_driver
+from listing import crawl_http
+from metrics import ITEMS_DISCOVERED, Metrics
+from resolver import ViewerResolver
+from selection import DEFAULT_DECADES
+from timing import StepTimer
 from utils import print_info
 
 
-def _build_driver(headless: bool = True) -> webdriver.Chrome:
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--window-size=1920,1080")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-
-
 def _extract_direct_pdf(driver: webdriver.Chrome, viewer_url: str) -> str | None:
     wait = WebDriverWait(driver, 20)
     original = driver.current_window_handle
@@ -52,296 +48,568 @@ def _extract_direct_pdf(driver: webdriver.Chrome, viewer_url: str) -> str | None
         return None
 
 
-def get_gazette_structure(base_url: str) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+# In-page extraction scripts: each returns everything Python needs in a single WebDriver round trip.
+# Entries are {num, href}; `href` is the anchor's resolved (absolute) URL.
+_CARDS_JS = """
+const out = [];
+document.querySelectorAll("div._df_book-cover.thumb-div, div._df_book-cover").forEach(card => {
+    const a = card.closest("a[href*='PDFViewer.aspx?file=']");
+    if (!a) return;
+    const span = card.querySelector("span._df_book-No, span.num-in-card, span.badge");
+    out.push({num: span ? (span.innerText || span.textContent || "").trim() : "", href: a.href});
+});
+return out;
+"""
+
+_ANCHORS_JS = """
+const LABELS = "span[class*='book-No'], span[class*='badge'], span[class*='num'], div[class*='numbers']";
+const numberIn = root => {
+    if (!root) return "";
+    for (const el of root.querySelectorAll(LABELS)) {
+        const txt = (el.innerText || el.textContent || "").trim();
+        if (/^\\d+$/.test(txt)) return txt;
+    }
+    return "";
+};
+return Array.from(document.querySelectorAll("a[href*='PDFViewer.aspx?file=']")).map(a => ({
+    num: numberIn(a) || numberIn(a.parentElement),
+    href: a.href,
+}));
+"""
+
+_NEXT_JS = """
+for (const btn of document.querySelectorAll("div.owl-next")) {
+    if (btn.offsetParent !== null || btn.getClientRects().length) {
+        btn.scrollIntoView({block: "center"});
+        btn.click();
+        return true;
+    }
+}
+return false;
+"""
+
+
+_SETTLE_JS = """
+if (!window.__gzObserver) {
+    window.__gzLastMutation = performance.now();
+    window.__gzObserver = new MutationObserver(() => { window.__gzLastMutation = performance.now(); });
+    window.__gzObserver.observe(document, {childList: true, subtree: true, attributes: true});
+}
+return {
+    ready: document.readyState !== "loading",
+    quietMs: performance.now() - window.__gzLastMutation,
+    resources: performance.getEntriesByType("resource").length,
+    count: arguments[0] ? document.querySelectorAll(arguments[0]).length : 0,
+};
+"""
+
+_CARD_SELECTOR = "div._df_book-cover.thumb-div, div._df_book-cover"
+
+# Condition-based waits: return as soon as the page is quiet, give up (best-effort) after the timeout.
+SETTLE_QUIET = 0.3
+SETTLE_TIMEOUT = 10.0
+# Upper bounds on whole loops, replacing fixed iteration caps; loops normally stop on "no progress"
+DECADE_SEARCH_BUDGET = 15.0
+LAZY_LOAD_BUDGET = 20.0
+PAGINATION_BUDGET = 120.0
+
+
+def _wait_settled(
+    driver: webdriver.Chrome,
+    selector: str | None = None,
+    quiet: float = SETTLE_QUIET,
+    timeout: float = SETTLE_TIMEOUT,
+) -> int:
     """
-    Navigate the Gazette landing page, click the 1960s decade, then iterate years 1962-1969
-    (skip 1961), collecting tuples of (display_number, PDFViewer URL) for each year.
-    Returns: { '1960s': { '1962': [(num, viewer_url), ...], ... } }
+    Wait until the document is loaded, no DOM mutation has happened for `quiet` seconds,
+    no new network resources were fetched and (if given) the `selector` match count is stable
+    over that window. Returns the last selector count. Never raises on timeout.
     """
-    driver = _build_driver(headless=True)
-    wait = WebDriverWait(driver, 20)
+    deadline = time.monotonic() + timeout
+    last_key = None
+    stable_since = time.monotonic()
+    state: Dict[str, object] = {"count": 0}
+    while True:
+        try:
+            state = driver.execute_script(_SETTLE_JS, selector) or state
+        except Exception:
+            return int(state.get("count") or 0)
+        now = time.monotonic()
+        key = (state.get("resources"), state.get("count"))
+        if key != last_key:
+            last_key = key
+            stable_since = now
+        if (
+            state.get("ready")
+            and float(state.get("quietMs") or 0) >= quiet * 1000
+            and now - stable_since >= quiet
+        ):
+            return int(state.get("count") or 0)
+        if now >= deadline:
+            return int(state.get("count") or 0)
+        time.sleep(0.05)
 
-    structure: Dict[str, Dict[str, List[Tuple[str, str]]]] = {"2000s": {}, "2020s": {}}
 
-    try:
-        driver.get(base_url)
-        time.sleep(2)
+def _scroll_click(driver: webdriver.Chrome, element) -> None:
+    driver.execute_script("arguments[0].scrollIntoView({block:'center'}); arguments[0].click();", element)
+
+
+def _open_decade(
+    driver: webdriver.Chrome,
+    decade_label: str,
+    decade_code: str,
+    first_year: int,
+    timer: Optional[StepTimer] = None,
+    key: str = "",
+) -> None:
+    timer = timer or StepTimer()
+    with timer.step(key, "decade_nav"):
+        # Move carousel until the target decade div is visible, then click it
+        try:
+            clicked_decade = False
+            deadline = time.monotonic() + DECADE_SEARCH_BUDGET
+            while True:
+                decade_divs = driver.find_elements(
+                    By.CSS_SELECTOR,
+                    f"div.years_col[onclick*='decade_{decade_code}']"
+                )
+                if decade_divs:
+                    _scroll_click(driver, decade_divs[0])
+                    clicked_decade = True
+                    break
+                if time.monotonic() >= deadline or not driver.execute_script(_NEXT_JS):
+                    break
+                _wait_settled(driver, quiet=0.15, timeout=2.0)
+            if not clicked_decade:
+                # Fallback: click the decade image wrapper
+                img = None
+                try:
+                    img = driver.find_element(By.CSS_SELECTOR, f"img[src*='{decade_label}']")
+                except Exception:
+                    pass
+                if img:
+                    parent = img.find_element(By.XPATH, "ancestor::div[contains(@class,'years_col')]")
+                    _scroll_click(driver, parent)
+                    clicked_decade = True
+            if not clicked_decade:
+                # Fallback: text-based
+                nodes = driver.find_elements(By.XPATH, f"//div[contains(@class,'years_col')][.//text()[contains(.,'{decade_label}')]]")
+                if nodes:
+                    _scroll_click(driver, nodes[0])
+                    clicked_decade = True
+            if clicked_decade:
+                print_info(f"Clicked {decade_label} decade div!")
+                # Best-effort wait for the first year of this decade to appear
+                try:
+                    WebDriverWait(driver, 10).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, f"span[data-value='year_{first_year}']"))
+                    )
+                except Exception:
+                    pass
+            else:
+                print_info(f"Could not find {decade_label} decade tile to click")
+            _wait_settled(driver)
+        except Exception as e:
+            print_info(f"Could not find/click {decade_label} decade div: {e}")
+
+
+def _crawl_year(
+    driver: webdriver.Chrome,
+    year_str: str,
+    resolve_viewer: Callable[[str], Optional[str]],
+    timer: Optional[StepTimer] = None,
+    key: str = "",
+    on_item: Optional[Callable[[str, str], None]] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Click one year tab of the already-open decade and collect its (display_num, url) tuples.
+    `on_item(display_num, url)` is called for each new tuple as soon as it is resolved.
+    """
+    timer = timer or StepTimer()
+    wait = WebDriverWait(driver, 20)
+    print_info(f"--- Processing year: {year_str} ---")
+    pdf_tuples: List[Tuple[str, str]] = []
 
-        decades_to_process = [
-            ("2000s", "2000", range(2000, 2010)),
-            ("2020s", "2020", range(2020, 2026)),
-        ]
+    try:
+        with timer.step(key, "year_click"):
+            year_span = wait.until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, f"span[data-value='year_{year_str}']"))
+            )
+            _scroll_click(driver, year_span)
+            print_info(f"Clicked year: {year_str}")
 
-        for decade_label, decade_code, year_range in decades_to_process:
-            # Move carousel until the target decade div is visible, then click it
+            # Wait for either card covers or PDF viewer anchors to appear
             try:
-                clicked_decade = False
-                for _ in range(30):
-                    decade_divs = driver.find_elements(
-                        By.CSS_SELECTOR,
-                        f"div.years_col[onclick*='decade_{decade_code}']"
+                wait.until(
+                    EC.presence_of_element_located(
+                        (
+                            By.CSS_SELECTOR,
+                            "div._df_book-cover.thumb-div, div._df_book-cover, a[href*='PDFViewer.aspx?file=']",
+                        )
                     )
-                    if decade_divs:
-                        decade_el = decade_divs[0]
-                        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", decade_el)
-                        time.sleep(0.3)
-                        driver.execute_script("arguments[0].click();", decade_el)
-                        clicked_decade = True
+                )
+            except Exception:
+                print_info(f"WARN: No cards/anchors became present for {year_str} after click.")
+            _wait_settled(driver, _CARD_SELECTOR)
+
+        # Load lazy content by scrolling to bottom until the card count stops growing
+        with timer.step(key, "lazy_load_scroll"):
+            try:
+                prev = -1
+                deadline = time.monotonic() + LAZY_LOAD_BUDGET
+                while time.monotonic() < deadline:
+                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                    current = _wait_settled(driver, _CARD_SELECTOR)
+                    if current <= prev:
                         break
-                    next_btn = driver.find_elements(By.CSS_SELECTOR, "div.owl-next")
-                    if next_btn:
-                        driver.execute_script("arguments[0].click();", next_btn[0])
-                        time.sleep(0.4)
-                if not clicked_decade:
-                    # Fallback: click the decade image wrapper
-                    img = None
-                    try:
-                        img = driver.find_element(By.CSS_SELECTOR, f"img[src*='{decade_label}']")
-                    except Exception:
-                        pass
-                    if img:
-                        parent = img.find_element(By.XPATH, "ancestor::div[contains(@class,'years_col')]")
-                        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", parent)
-                        time.sleep(0.2)
-                        driver.execute_script("arguments[0].click();", parent)
-                        clicked_decade = True
-                if not clicked_decade:
-                    # Fallback: text-based
-                    nodes = driver.find_elements(By.XPATH, f"//div[contains(@class,'years_col')][.//text()[contains(.,'{decade_label}')]]")
-                    if nodes:
-                        node = nodes[0]
-                        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", node)
-                        time.sleep(0.2)
-                        driver.execute_script("arguments[0].click();", node)
-                        clicked_decade = True
-                if clicked_decade:
-                    print_info(f"Clicked {decade_label} decade div!")
-                    # Best-effort wait for the first year of this decade to appear
-                    try:
-                        WebDriverWait(driver, 10).until(
-                            EC.presence_of_element_located((By.CSS_SELECTOR, f"span[data-value='year_{year_range.start}']"))
-                        )
-                    except Exception:
-                        pass
-                else:
-                    print_info(f"Could not find {decade_label} decade tile to click")
-                time.sleep(1.0)
-            except Exception as e:
-                print_info(f"Could not find/click {decade_label} decade div: {e}")
-
-            # Process years for this decade
-            for yr in year_range:
-                year_str = str(yr)
-                print_info(f"--- Processing year: {year_str} ---")
-                pdf_tuples: List[Tuple[str, str]] = []
-                structure[decade_label][year_str] = pdf_tuples
+                    prev = current
+                # Scroll back to top for consistent element positions
+                driver.execute_script("window.scrollTo(0, 0);")
+            except Exception:
+                pass
 
-                try:
-                    year_span = wait.until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, f"span[data-value='year_{year_str}']"))
-                    )
-                    driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", year_span)
-                    time.sleep(0.2)
-                    driver.execute_script("arguments[0].click();", year_span)
-                    print_info(f"Clicked year: {year_str}")
-
-                    # Wait for either card covers or PDF viewer anchors to appear
-                    try:
-                        wait.until(
-                            EC.presence_of_element_located(
-                                (
-                                    By.CSS_SELECTOR,
-                                    "div._df_book-cover.thumb-div, div._df_book-cover, a[href*='PDFViewer.aspx?file=']",
-                                )
-                            )
-                        )
-                    except Exception:
-                        print_info(f"WARN: No cards/anchors became present for {year_str} after click.")
-                    time.sleep(0.5)
-
-                    # Attempt to load lazy content by scrolling to bottom repeatedly until count stabilizes
-                    try:
-                        prev = -1
-                        for _ in range(8):
-                            current = len(driver.find_elements(By.CSS_SELECTOR, "div._df_book-cover.thumb-div, div._df_book-cover"))
-                            if current <= prev:
-                                break
-                            prev = current
-                            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                            time.sleep(0.5)
-                        # Scroll back to top for consistent element positions
-                        driver.execute_script("window.scrollTo(0, 0);")
-                        time.sleep(0.3)
-                    except Exception:
-                        pass
-
-                except Exception as e:
-                    print_info(f"Could not find/click year {year_str}: {e}")
-                    structure[decade_label][year_str] = []
+    except Exception as e:
+        print_info(f"Could not find/click year {year_str}: {e}")
+        return []
+
+    seen_urls = set()
+
+    def add_entries(entries: List[Dict[str, str]], default_num: Callable[[int], str]) -> None:
+        for idx, entry in enumerate(entries or []):
+            try:
+                display_num = (entry.get("num") or "").strip() or default_num(idx)
+                viewer_url = entry.get("href")
+                if viewer_url and viewer_url.startswith("/"):
+                    viewer_url = "https://dlp.dubai.gov.ae" + viewer_url
+                with timer.step(key, "viewer_resolution"):
+                    direct_pdf = resolve_viewer(viewer_url) if viewer_url else None
+                final_url = direct_pdf or viewer_url
+                # Only include PDFs that clearly belong to this year (e.g., OGD_1962_*.pdf)
+                if final_url and final_url.lower().endswith('.pdf') and f"_{year_str}_" not in final_url:
                     continue
+                if final_url and final_url not in seen_urls:
+                    pdf_tuples.append((display_num, final_url))
+                    seen_urls.add(final_url)
+                    if on_item is not None:
+                        on_item(display_num, final_url)
+            except Exception:
+                continue
 
-                seen_urls = set()
+    # Pages are collected first and resolved afterwards, so "pagination" and "viewer_resolution"
+    # are timed separately. Each batch keeps its own default numbering for cards without a label.
+    batches: List[Tuple[List[Dict[str, str]], Callable[[int], str]]] = []
 
-                # Prefer card elements to avoid duplicated overlay anchors; handle horizontal carousel pagination
-                try:
-                    # Find an ancestor container that likely holds the carousel
-                    def collect_cards() -> List:
-                        return driver.find_elements(By.CSS_SELECTOR, "div._df_book-cover.thumb-div, div._df_book-cover")
-
-                    def page_cards_to_tuples(cards_now: List) -> None:
-                        for idx, card in enumerate(cards_now):
-                            try:
-                                # Extract display number
-                                display_num = None
-                                try:
-                                    num_span = card.find_element(By.CSS_SELECTOR, "span._df_book-No, span.num-in-card, span.badge")
-                                    display_num = num_span.text.strip()
-                                except Exception:
-                                    display_num = None
-                                if not display_num:
-                                    display_num = str(idx + 1)
-
-                                # Find ancestor anchor to viewer page
-                                a_tag = card.find_element(By.XPATH, "./ancestor::a[contains(@href, 'PDFViewer.aspx?file=') or contains(@href, 'PDFViewer.aspx?file=')]")
-                                href_val = a_tag.get_attribute("href")
-                                if href_val and href_val.startswith("/"):
-                                    href_val = "https://dlp.dubai.gov.ae" + href_val
-                                direct_pdf = _extract_direct_pdf(driver, href_val) if href_val else None
-                                final_url = direct_pdf or href_val
-                                # Only include PDFs that clearly belong to this year (e.g., OGD_1962_*.pdf)
-                                if final_url and final_url.lower().endswith('.pdf') and f"_{year_str}_" not in final_url:
-                                    continue
-                                if final_url and final_url not in seen_urls:
-                                    pdf_tuples.append((display_num, final_url))
-                                    seen_urls.add(final_url)
-                            except Exception:
-                                continue
-
-                    # Iterate pages by clicking the local owl-next until exhausted
-                    last_count = -1
-                    for _ in range(30):
-                        cards_now = collect_cards()
-                        page_cards_to_tuples(cards_now)
-                        if len(seen_urls) <= last_count:
-                            break
-                        last_count = len(seen_urls)
-                        # Try click a local next button near cards
-                        next_candidates = driver.find_elements(By.CSS_SELECTOR, "div.owl-next")
-                        clicked = False
-                        for btn in next_candidates:
-                            try:
-                                # Only click if button is displayed and in viewport
-                                if btn.is_displayed():
-                                    driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-                                    time.sleep(0.2)
-                                    driver.execute_script("arguments[0].click();", btn)
-                                    clicked = True
-                                    time.sleep(0.5)
-                                    break
-                            except Exception:
-                                continue
-                        if not clicked:
-                            break
-                except Exception:
-                    # Fallback to anchors if carousel handling fails
-                    pdf_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='PDFViewer.aspx?file=']")
-                    for idx in range(len(pdf_links)):
-                        try:
-                            links_now = driver.find_elements(By.CSS_SELECTOR, "a[href*='PDFViewer.aspx?file=']")
-                            if idx >= len(links_now):
-                                break
-                            a_tag = links_now[idx]
-                            viewer_url = a_tag.get_attribute("href")
-                            # Heuristics to find a nearby numeric label
-                            display_num = None
-                            try:
-                                candidates = a_tag.find_elements(
-                                    By.XPATH,
-                                    ".//span[contains(@class, 'book-No') or contains(@class, 'badge') or contains(@class, 'num') or contains(@class, '_df_book-No')] | .//div[contains(@class,'numbers')]",
-                                )
-                                for c in candidates:
-                                    txt = c.text.strip()
-                                    if txt.isdigit():
-                                        display_num = txt
-                                        break
-                                if not display_num:
-                                    parent = a_tag.find_element(By.XPATH, "..")
-                                    siblings = parent.find_elements(
-                                        By.XPATH,
-                                        ".//span[contains(@class, 'book-No') or contains(@class, 'badge') or contains(@class, 'num') or contains(@class, '_df_book-No')] | .//div[contains(@class,'numbers')]",
-                                    )
-                                    for c in siblings:
-                                        txt = c.text.strip()
-                                        if txt.isdigit():
-                                            display_num = txt
-                                            break
-                            except Exception:
-                                pass
-                            if not display_num:
-                                display_num = str(idx + 1)
-                            if viewer_url and viewer_url.startswith("/"):
-                                viewer_url = "https://dlp.dubai.gov.ae" + viewer_url
-                            direct_pdf = _extract_direct_pdf(driver, viewer_url) if viewer_url else None
-                            final_url = direct_pdf or viewer_url
-                            if final_url and final_url.lower().endswith('.pdf') and f"_{year_str}_" not in final_url:
-                                continue
-                            if final_url and final_url not in seen_urls:
-                                pdf_tuples.append((display_num, final_url))
-                                seen_urls.add(final_url)
-                        except Exception:
-                            continue
-
-                # Anchor sweep to catch any offscreen/hidden DOM items for this year
-                try:
-                    pdf_links_all = driver.find_elements(By.CSS_SELECTOR, "a[href*='PDFViewer.aspx?file=']")
-                    for idx2, a_tag in enumerate(pdf_links_all):
-                        try:
-                            viewer_url = a_tag.get_attribute("href")
-                            # Attempt to read a numeric label near the anchor
-                            display_num = None
-                            try:
-                                candidates = a_tag.find_elements(
-                                    By.XPATH,
-                                    ".//span[contains(@class, 'book-No') or contains(@class, 'badge') or contains(@class, 'num') or contains(@class, '_df_book-No')] | .//div[contains(@class,'numbers')]",
-                                )
-                                for c in candidates:
-                                    txt = c.text.strip()
-                                    if txt.isdigit():
-                                        display_num = txt
-                                        break
-                                if not display_num:
-                                    parent = a_tag.find_element(By.XPATH, "..")
-                                    siblings = parent.find_elements(
-                                        By.XPATH,
-                                        ".//span[contains(@class, 'book-No') or contains(@class, 'badge') or contains(@class, 'num') or contains(@class, '_df_book-No')] | .//div[contains(@class,'numbers')]",
-                                    )
-                                    for c in siblings:
-                                        txt = c.text.strip()
-                                        if txt.isdigit():
-                                            display_num = txt
-                                            break
-                            except Exception:
-                                pass
-                            if not display_num:
-                                display_num = str(len(pdf_tuples) + 1)
-
-                            if viewer_url and viewer_url.startswith("/"):
-                                viewer_url = "https://dlp.dubai.gov.ae" + viewer_url
-                            direct_pdf = _extract_direct_pdf(driver, viewer_url) if viewer_url else None
-                            final_url = direct_pdf or viewer_url
-                            if final_url and final_url.lower().endswith('.pdf') and f"_{year_str}_" not in final_url:
-                                continue
-                            if final_url and final_url not in seen_urls:
-                                pdf_tuples.append((display_num, final_url))
-                                seen_urls.add(final_url)
-                        except Exception:
-                            continue
-                except Exception:
-                    pass
+    # Prefer card elements to avoid duplicated overlay anchors; handle horizontal carousel pagination.
+    # Each carousel page costs one execute_script for all cards and one for the next click.
+    with timer.step(key, "pagination"):
+        try:
+            seen_hrefs = set()
+            last_count = -1
+            deadline = time.monotonic() + PAGINATION_BUDGET
+            while time.monotonic() < deadline:
+                cards = driver.execute_script(_CARDS_JS) or []
+                batches.append((cards, lambda idx: str(idx + 1)))
+                seen_hrefs.update(card.get("href") for card in cards)
+                if len(seen_hrefs) <= last_count:
+                    break
+                last_count = len(seen_hrefs)
+                # Click the first displayed owl-next, if any
+                if not driver.execute_script(_NEXT_JS):
+                    break
+                _wait_settled(driver, _CARD_SELECTOR, quiet=0.2)
+        except Exception:
+            # Fallback to anchors if carousel handling fails
+            try:
+                batches.append((driver.execute_script(_ANCHORS_JS), lambda idx: str(idx + 1)))
+            except Exception:
+                pass
+
+        # Anchor sweep to catch any offscreen/hidden DOM items for this year
+        try:
+            batches.append((driver.execute_script(_ANCHORS_JS), lambda idx: str(len(pdf_tuples) + 1)))
+        except Exception:
+            pass
 
-                print_info(f"Found {len(pdf_tuples)} unique PDFs for {year_str}.")
+    for entries, default_num in batches:
+        add_entries(entries, default_num)
 
+    print_info(f"Found {len(pdf_tuples)} unique PDFs for {year_str}.")
+    return pdf_tuples
+
+
+class _CrawlStopped(Exception):
+    """Raised into the crawl once the consumer of iter_gazette_items has gone away."""
+
+
+class _DriverPool:
+    """
+    One headless Chrome per worker thread, built lazily and reused for every
+    (decade, year) unit that thread picks up. Each driver remembers which decade it has open,
+    so consecutive years of the same decade skip the landing page reload and decade click.
+    With keep_warm, worker i attaches to (or leaves running) warm browser slot i across runs.
+    """
+
+    def __init__(self, base_url: str, timer: StepTimer, keep_warm: bool = False) -> None:
+        self.base_url = base_url
+        self.timer = timer
+        self.keep_warm = keep_warm
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._drivers: List[Optional[webdriver.Chrome]] = []
+
+    def driver_for(self, decade_label: str, decade_code: str, first_year: int, key: str) -> webdriver.Chrome:
+        driver = getattr(self._local, "driver", None)
+        if driver is None:
+            with self._lock:
+                slot = len(self._drivers)
+                self._drivers.append(None)
+            with self.timer.step(key, "browser_startup"):
+                driver = build_driver(headless=True, reuse_slot=slot if self.keep_warm else None)
+            with self._lock:
+                self._drivers[slot] = driver
+            self._local.driver = driver
+            self._local.decade = None
+        if self._local.decade != decade_label:
+            with self.timer.step(key, "page_load"):
+                driver.get(self.base_url)
+                _wait_settled(driver)
+            _open_decade(driver, decade_label, decade_code, first_year, self.timer, key)
+            self._local.decade = decade_label
+        return driver
+
+    def forget_decade(self) -> None:
+        """Force the next unit on this thread to reload the landing page (e.g. after an error)."""
+        self._local.decade = None
+
+    def quit_all(self) -> None:
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            if driver is not None:
+                release_driver(driver, keep_warm=self.keep_warm)
+
+
+def _decades_to_process(
+    decades: Optional[Iterable[Tuple[str, str, Iterable[int]]]],
+) -> List[Tuple[str, str, List[int]]]:
+    return [
+        (label, code, list(years)) for label, code, years in (DEFAULT_DECADES if decades is None else decades)
+    ]
+
+
+def _run_crawl(
+    base_url: str,
+    decades_to_process: List[Tuple[str, str, List[int]]],
+    resolver: Optional[ViewerResolver],
+    workers: int,
+    timer: Optional[StepTimer],
+    on_item: Callable[[str, str, str, str], None],
+    keep_warm: bool = False,
+    backend: str = "auto",
+    metrics: Optional[Metrics] = None,
+    on_year: Optional[Callable[[str, str, List[Tuple[str, str]]], None]] = None,
+) -> None:
+    """
+    Crawl every (decade, year) unit, reporting each item via on_item, and each finished
+    year with all its (display_num, url) items via on_year, if given. Backends:
+    "http" lists years over plain HTTP only (listing.crawl_http), "browser" clicks through
+    the carousel on a pool of browsers, "auto" tries HTTP and sends only the years it could
+    not list to the browsers. Items are counted per year in `metrics`, and each year's
+    total is logged as a "year_crawled" event at the end.
+    """
+    if backend not in ("auto", "http", "browser"):
+        raise ValueError(f"unknown crawl backend: {backend}")
+    resolver = resolver or ViewerResolver()
+    metrics = metrics or Metrics()
+    timer = timer or StepTimer(metrics)
+    all_years = [(label, str(yr)) for label, _, years in decades_to_process for yr in years]
+
+    found: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+    found_lock = threading.Lock()
+
+    def counted(decade_label: str, year_str: str, display_num: str, url: str) -> None:
+        metrics.inc(ITEMS_DISCOVERED, decade=decade_label, year=year_str)
+        if on_year is not None:
+            with found_lock:
+                found.setdefault((decade_label, year_str), []).append((display_num, url))
+        on_item(decade_label, year_str, display_num, url)
+
+    def year_done(decade_label: str, year_str: str) -> None:
+        if on_year is not None:
+            with found_lock:
+                items = found.pop((decade_label, year_str), [])
+            on_year(decade_label, year_str, items)
+
+    def finish() -> None:
+        resolver.save()
+        for decade_label, year_str in all_years:
+            items = metrics.counter(ITEMS_DISCOVERED, decade=decade_label, year=year_str)
+            metrics.event("year_crawled", decade=decade_label, year=year_str, items=int(items))
+        print_info("Crawl timing (total seconds/count per step):\n" + timer.report())
+
+    if backend != "browser":
+        leftover = crawl_http(
+            base_url, decades_to_process, resolver, workers, timer, counted,
+            browser_fallback=backend == "auto", on_year=year_done,
+        )
+        if leftover:
+            years = ", ".join(f"{label} {years}" for label, _, years in leftover)
+            if backend == "http":
+                print_info(f"HTTP listing could not cover: {years} (not crawled; try --backend auto)")
+                leftover = []
+            else:
+                print_info(f"HTTP listing could not cover: {years}; falling back to the browser")
+        decades_to_process = leftover
+
+    units = [
+        (label, code, years[0], str(yr)) for label, code, years in decades_to_process for yr in years
+    ]
+    if not units:
+        finish()
+        return
+
+    pool = _DriverPool(base_url, timer, keep_warm)
+
+    def run_unit(decade_label: str, decade_code: str, first_year: int, year_str: str) -> None:
+        key = f"{decade_label}/{year_str}"
+        try:
+            driver = pool.driver_for(decade_label, decade_code, first_year, key)
+
+            def resolve_viewer(viewer_url: str) -> str | None:
+                return resolver.resolve(viewer_url, lambda u: _extract_direct_pdf(driver, u))
+
+            def emit(display_num: str, url: str) -> None:
+                counted(decade_label, year_str, display_num, url)
+
+            _crawl_year(driver, year_str, resolve_viewer, timer, key, emit)
+            year_done(decade_label, year_str)
+        except _CrawlStopped:
+            raise
+        except Exception as e:
+            print_info(f"Crawl failed for {decade_label}/{year_str}: {e}")
+            pool.forget_decade()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(units)))) as executor:
+            futures = [executor.submit(run_unit, *unit) for unit in units]
+            try:
+                for future in futures:
+                    future.result()
+            except _CrawlStopped:
+                for future in futures:
+                    future.cancel()
+                raise
     finally:
-        driver.quit()
+        pool.quit_all()
+        finish()
+
 
+def get_gazette_structure(
+    base_url: str,
+    decades: Optional[Iterable[Tuple[str, str, Iterable[int]]]] = None,
+    resolver: Optional[ViewerResolver] = None,
+    workers: int = 1,
+    timer: Optional[StepTimer] = None,
+    keep_warm: bool = False,
+    backend: str = "auto",
+    metrics: Optional[Metrics] = None,
+) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+    """
+    Navigate the Gazette landing page, click each requested decade tile, then iterate its years,
+    collecting tuples of (display_number, PDF URL) for each year.
+    `decades` defaults to DEFAULT_DECADES; pass a subset to re-crawl only some years.
+    Viewer URLs are resolved through `resolver` (HTTP first, a browser tab only as fallback).
+    With workers > 1 every (decade, year) is an independent unit run on a pool of headless
+    browsers, one per worker thread; results are merged back in decade/year order.
+    Time spent per step (http_listing, page_load, decade_nav, year_click, lazy_load_scroll, pagination,
+    viewer_resolution) is recorded per "decade/year" in `timer` and printed at the end.
+    keep_warm leaves the browsers running for the next run to attach to (see browser.build_driver).
+    backend "auto" (default) lists years over plain HTTP first and starts browsers only for
+    years that yields nothing; "http" never starts a browser, "browser" never tries HTTP.
+    Items discovered per year are counted in `metrics` (see metrics.py).
+    Returns: { '2000s': { '2000': [(num, pdf_url), ...], ... } }
+    """
+    decades_to_process = _decades_to_process(decades)
+    # Pre-create every key so the merged structure keeps decade/year order regardless of finish order
+    structure: Dict[str, Dict[str, List[Tuple[str, str]]]] = {
+        label: {str(yr): [] for yr in years} for label, _, years in decades_to_process
+    }
+
+    def collect(decade_label: str, year_str: str, display_num: str, url: str) -> None:
+        # Each year is crawled by exactly one thread, so its list has a single writer
+        structure[decade_label][year_str].append((display_num, url))
+
+    _run_crawl(base_url, decades_to_process, resolver, workers, timer, collect, keep_warm, backend, metrics)
     return structure
+
+
+def iter_gazette_items(
+    base_url: str,
+    decades: Optional[Iterable[Tuple[str, str, Iterable[int]]]] = None,
+    resolver: Optional[ViewerResolver] = None,
+    workers: int = 1,
+    timer: Optional[StepTimer] = None,
+    queue_size: int = 1000,
+    keep_warm: bool = False,
+    backend: str = "auto",
+    metrics: Optional[Metrics] = None,
+    on_year: Optional[Callable[[str, str, List[Tuple[str, str]]], None]] = None,
+) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Streaming form of get_gazette_structure: yields (decade, year, display_num, url) records
+    as soon as each one is resolved, while the crawl keeps running in the background.
+    If the consumer falls `queue_size` records behind, the crawl waits for it.
+    on_year(decade, year, items) is called from the crawl as soon as a year is complete,
+    whatever the consumer has done with its records (e.g. to save it to the manifest).
+    """
+    records: "queue.Queue[object]" = queue.Queue(maxsize=max(1, queue_size))
+    done = object()
+    errors: List[BaseException] = []
+    stop = threading.Event()
+
+    def put(record: object) -> None:
+        # Never block for good on a full queue: the consumer may have stopped reading
+        while not stop.is_set():
+            try:
+                records.put(record, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+        raise _CrawlStopped()
+
+    def crawl() -> None:
+        try:
+            _run_crawl(
+                base_url, _decades_to_process(decades), resolver, workers, timer,
+                lambda *record: put(record), keep_warm, backend, metrics, on_year,
+            )
+        except _CrawlStopped:
+            pass
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            try:
+                put(done)
+            except _CrawlStopped:
+                pass
+
+    thread = threading.Thread(target=crawl, name="gazette-crawl", daemon=True)
+    thread.start()
+    try:
+        while True:
+            record = records.get()
+            if record is done:
+                break
+            yield record
+    finally:
+        # Also reached when the consumer closes the generator early (e.g. the download failed):
+        # stop the crawl, and drain the queue until it has quit its browsers
+        stop.set()
+        while thread.is_alive():
+            try:
+                records.get(timeout=0.5)
+            except queue.Empty:
+                pass
+        thread.join()
+    if errors:
+        raise errors[0]
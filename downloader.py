@@ -1,47 +1,402 @@
+import hashlib
 import os
+import tempfile
+import threading
 import time
-from typing import Dict, List, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from requests.adapters import HTTPAdapter
 
+from journal import DONE, FAILED, IN_FLIGHT, QUEUED, SKIPPED, DownloadJournal, ItemKey
+from metrics import DOWNLOAD_SECONDS, DOWNLOADED_BYTES, FILES, HTTP_RESPONSES, RETRIES, REVALIDATED, THROTTLED, Metrics
+from ratelimit import (
+    THROTTLE_STATUSES, HostScheduler, RetryQueue, Throttled, _Slot, backoff_delay, client_error, parse_retry_after,
+)
+from segments import SegmentParts, parse_content_range
+from store import ContentStore
 from utils import sanitize_filename, print_info
 
 
-def _build_driver(headless: bool = True) -> webdriver.Chrome:
-    options = Options()
-    if headless:
-        options.add_argument("--headless=new")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-    options.add_argument("--window-size=1920,1080")
-    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+# Defaults keep the historical one-file-at-a-time behaviour; callers opt into concurrency.
+DEFAULT_WORKERS = 1
+DEFAULT_PER_HOST = 4
+DOWNLOAD_ATTEMPTS = 5
+# Downloads queued or running at once in streaming mode; a full queue pauses the producer
+DEFAULT_QUEUE_SIZE = 64
+CHUNK_SIZE = 64 * 1024
+PDF_MAGIC = b"%PDF"
+# A complete PDF ends with %%EOF, give or take a few trailing bytes
+PDF_EOF = b"%%EOF"
+PDF_TAIL = 1024
+# Journal reason of files found on disk rather than downloaded
+ALREADY_PRESENT = "already present"
+# Ranges of one segmented file fetched at once; each still takes its own host slot
+SEGMENT_WORKERS = 4
+
+
+def _build_session(workers: int) -> requests.Session:
+    """
+    One keep-alive Session shared by all workers, with a connection pool large enough
+    that no worker has to wait for (or re-open) a socket.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, workers))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 # NOTE: We no longer use Selenium to resolve viewer pages here due to network/driver fetch issues.
 # All URLs provided to the downloader should already be direct .pdf links from the crawler.
 
-def _download_to_path(pdf_url: str, pdf_path: str) -> bool:
-    # Simple retry with backoff (handles transient DNS/connection issues)
-    attempts = 5
-    for attempt in range(1, attempts + 1):
+def _is_valid_pdf(pdf_path: str, store: Optional[ContentStore] = None) -> bool:
+    """
+    A file only counts as present if it starts with the %PDF header and has a %%EOF marker
+    near its end, so a file truncated by an interrupted write is fetched again. With a
+    store, a file it has indexed must also still have its indexed size.
+    """
+    try:
+        with open(pdf_path, "rb") as f:
+            if f.read(len(PDF_MAGIC)) != PDF_MAGIC:
+                return False
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - PDF_TAIL))
+            if PDF_EOF not in f.read():
+                return False
+    except OSError:
+        return False
+    entry = store.lookup(pdf_path) if store is not None else None
+    return entry is None or entry["size"] == size
+
+
+def _write_verified(
+    chunks: Iterable[bytes],
+    pdf_path: str,
+    store: Optional[ContentStore],
+    url: Optional[str],
+    expected_size: Optional[int] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> None:
+    """
+    Write chunks into a temp file next to pdf_path (hashing them on the way), verify it,
+    fsync, then atomically move it into place. pdf_path is either untouched or complete,
+    never truncated. With a store, the body goes into the content store and pdf_path
+    becomes a hard link to it, so identical PDFs are kept once.
+    """
+    directory, name = os.path.split(pdf_path)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".part", dir=directory or ".")
+    try:
+        written = 0
+        head = b""
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if len(head) < len(PDF_MAGIC):
+                    head += chunk[: len(PDF_MAGIC) - len(head)]
+                f.write(chunk)
+                digest.update(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if expected_size is not None and written != expected_size:
+            raise IOError(f"incomplete body: got {written} of {expected_size} bytes")
+        if head != PDF_MAGIC:
+            raise ValueError(f"not a PDF (starts with {head!r})")
+
+        # mkstemp creates 0600 files; give the PDF ordinary read permissions
+        os.chmod(tmp_path, 0o644)
+        if store is None:
+            os.replace(tmp_path, pdf_path)
+        elif store.commit(
+            tmp_path, pdf_path, url, written, digest.hexdigest(), etag=etag, last_modified=last_modified,
+        ):
+            print_info(f"Duplicate content, linked: {pdf_path}")
+    except BaseException:
         try:
-            resp = requests.get(pdf_url, timeout=60)
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _counted(chunks: Iterable[bytes], metrics: Optional[Metrics]) -> Iterator[bytes]:
+    """Pass body chunks through, adding their size to DOWNLOADED_BYTES."""
+    for chunk in chunks:
+        if metrics is not None:
+            metrics.inc(DOWNLOADED_BYTES, len(chunk))
+        yield chunk
+
+
+def _stream_to_file(
+    resp: requests.Response, pdf_path: str, store: Optional[ContentStore] = None, metrics: Optional[Metrics] = None,
+) -> None:
+    """Save a response body at pdf_path through _write_verified, checking it against Content-Length."""
+    expected = resp.headers.get("Content-Length")
+    # Content-Length is the encoded size; only comparable when the body is not compressed
+    comparable = expected and expected.isdigit() and not resp.headers.get("Content-Encoding")
+    _write_verified(
+        _counted(resp.iter_content(chunk_size=CHUNK_SIZE), metrics), pdf_path, store, resp.url,
+        expected_size=int(expected) if comparable else None,
+        etag=resp.headers.get("ETag"), last_modified=resp.headers.get("Last-Modified"),
+    )
+
+
+def _default_scheduler(per_host: int) -> HostScheduler:
+    # Start at half the cap and let AIMD find the rate the host tolerates
+    return HostScheduler(per_host, initial_concurrency=max(1, per_host // 2))
+
+
+def _check_response(resp: requests.Response, slot: _Slot, metrics: Optional[Metrics]) -> None:
+    """
+    First look at a response, right after its headers arrived: time the slot up to here, count
+    the status, report a 429/503 to the scheduler (with its Retry-After) and raise Throttled.
+    """
+    slot.responded()
+    if metrics is not None:
+        metrics.inc(HTTP_RESPONSES, status=resp.status_code)
+        if resp.status_code in THROTTLE_STATUSES:
+            metrics.inc(THROTTLED)
+    if resp.status_code in THROTTLE_STATUSES:
+        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        slot.throttled(retry_after)
+        raise Throttled(resp.status_code, retry_after)
+
+
+def _fetch_once(
+    pdf_url: str,
+    pdf_path: str,
+    session: requests.Session,
+    scheduler: HostScheduler,
+    store: Optional[ContentStore] = None,
+    segment_size: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+) -> None:
+    """One download attempt under the host scheduler; raises on failure (Throttled for 429/503)."""
+    if segment_size:
+        _fetch_segmented(pdf_url, pdf_path, session, scheduler, store, segment_size, metrics)
+        return
+    with scheduler.slot(pdf_url) as slot:
+        with session.get(pdf_url, timeout=60, stream=True) as resp:
+            _check_response(resp, slot, metrics)
             resp.raise_for_status()
-            with open(pdf_path, "wb") as f:
-                f.write(resp.content)
-            print_info(f"Saved: {pdf_path}")
-            return True
+            _stream_to_file(resp, pdf_path, store, metrics)
+
+
+def _fetch_segmented(
+    pdf_url: str,
+    pdf_path: str,
+    session: requests.Session,
+    scheduler: HostScheduler,
+    store: Optional[ContentStore],
+    segment_size: int,
+    metrics: Optional[Metrics] = None,
+) -> None:
+    """
+    One download attempt in byte ranges. The first request asks for the first missing range;
+    a server that answers 200 (no range support, a file that fits in one segment, or an
+    If-Range showing that the file changed since the saved parts) gets the body streamed as
+    usual. Otherwise the answer tells the total size, and the remaining ranges are fetched in
+    parallel, each saved as soon as it completes, so a failed attempt keeps every finished
+    range and the next attempt fetches only what is missing. The file is assembled from the
+    parts, verified and committed only once all of them are on disk.
+    Ranges are only combined when they can be pinned to one version of one URL with If-Range
+    (a strong ETag or Last-Modified); a server that sends neither gets a whole-file download.
+    """
+    parts = SegmentParts(pdf_path)
+    if parts.meta is not None and (parts.meta.get("url") != pdf_url or not parts.validator()):
+        # Parts of another URL, or of a version If-Range cannot pin down: never mix them in
+        parts.clear()
+    pending = parts.missing(segment_size) if parts.meta is not None else [(0, segment_size - 1)]
+    if parts.meta is not None:
+        saved = parts.size - sum(end - start + 1 for start, end in pending)
+        print_info(f"Resuming {pdf_path}: {saved}/{parts.size} bytes already saved")
+
+    unpinned = False
+    if pending:
+        start, end = pending[0]
+        headers = {"Range": f"bytes={start}-{end}"}
+        if parts.validator():
+            headers["If-Range"] = parts.validator()
+        with scheduler.slot(pdf_url) as slot:
+            with session.get(pdf_url, headers=headers, timeout=60, stream=True) as resp:
+                _check_response(resp, slot, metrics)
+                if resp.status_code == 416:
+                    parts.clear()
+                resp.raise_for_status()
+                content_range = parse_content_range(resp.headers.get("Content-Range"))
+                if resp.status_code != 206 or content_range is None or content_range[1] + 1 - content_range[0] == content_range[2]:
+                    parts.clear()
+                    _stream_to_file(resp, pdf_path, store, metrics)
+                    return
+                first, last, total = content_range
+                if first != start:
+                    raise IOError(f"asked for bytes {start}-{end}, got {first}-{last}")
+                etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+                if not parts.matches(pdf_url, total, etag, last_modified):
+                    parts.start(pdf_url, total, etag, last_modified)
+                unpinned = not parts.validator()
+                if not unpinned:
+                    parts.save(first, last, _counted(resp.iter_content(chunk_size=CHUNK_SIZE), metrics))
+    if unpinned:
+        parts.clear()
+        _fetch_once(pdf_url, pdf_path, session, scheduler, store, None, metrics)
+        return
+
+    def fetch_range(byte_range: Tuple[int, int]) -> None:
+        start, end = byte_range
+        headers = {"Range": f"bytes={start}-{end}"}
+        if parts.validator():
+            headers["If-Range"] = parts.validator()
+        with scheduler.slot(pdf_url) as slot:
+            with session.get(pdf_url, headers=headers, timeout=60, stream=True) as resp:
+                _check_response(resp, slot, metrics)
+                if resp.status_code in (200, 416):
+                    # The file changed (or shrank) under the saved parts: start over next attempt
+                    parts.clear()
+                    raise IOError(f"{pdf_url} changed during a segmented download (HTTP {resp.status_code})")
+                resp.raise_for_status()
+                content_range = parse_content_range(resp.headers.get("Content-Range"))
+                if resp.status_code != 206 or content_range != (start, end, parts.size):
+                    raise IOError(f"asked for bytes {start}-{end}/{parts.size}, got {resp.headers.get('Content-Range')}")
+                parts.save(start, end, _counted(resp.iter_content(chunk_size=CHUNK_SIZE), metrics))
+
+    remaining = parts.missing(segment_size)
+    if remaining:
+        with ThreadPoolExecutor(max_workers=min(SEGMENT_WORKERS, len(remaining))) as pool:
+            # Let every range finish (and be saved) before reporting the first failure
+            outcomes = [f.exception() for f in [pool.submit(fetch_range, r) for r in remaining]]
+        errors = [e for e in outcomes if e is not None]
+        if errors:
+            raise errors[0]
+
+    meta = parts.meta or {}
+    try:
+        _write_verified(
+            parts.read(CHUNK_SIZE), pdf_path, store, pdf_url, expected_size=parts.size,
+            etag=meta.get("etag"), last_modified=meta.get("last_modified"),
+        )
+    except ValueError:
+        # Complete but not a PDF: the parts are no use to a retry
+        parts.clear()
+        raise
+    parts.clear()
+
+
+class _DownloadRunner:
+    """
+    Runs download attempts on a thread pool under a HostScheduler. A failed attempt is not
+    retried in place: it is parked on a RetryQueue for its backoff (jittered exponential, or
+    the server's Retry-After) and then re-queued behind the files already waiting, so a bad
+    file never holds a worker through a sleep. submit() returns a Future resolved with the
+    final outcome (True once saved, False after `attempts` failures, or at once when the
+    server answers with a client error such as 404 or 403). Every transition is
+    recorded in the journal; saved files, retries and attempt failures also go to `metrics`
+    as counters and events.
+    """
+
+    def __init__(
+        self,
+        pool: ThreadPoolExecutor,
+        session: requests.Session,
+        scheduler: HostScheduler,
+        store: Optional[ContentStore],
+        journal: DownloadJournal,
+        attempts: int = DOWNLOAD_ATTEMPTS,
+        segment_size: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> None:
+        self.pool = pool
+        self.session = session
+        self.scheduler = scheduler
+        self.store = store
+        self.journal = journal
+        self.attempts = attempts
+        self.segment_size = segment_size
+        self.metrics = metrics or Metrics()
+        self.retries = RetryQueue(lambda job: pool.submit(job))
+        # Items the server answered with a client error (404, 403, ...); never retried
+        self.refused: Set[ItemKey] = set()
+
+    def submit(self, key: ItemKey, url: str, path: str) -> Future:
+        future: Future = Future()
+        self.journal.record(key, QUEUED, url)
+        self.pool.submit(self._attempt, key, url, path, 1, future)
+        return future
+
+    def _attempt(self, key: ItemKey, url: str, path: str, attempt: int, future: Future) -> None:
+        """Run one attempt; whatever it raises, the future is resolved unless a retry was queued."""
+        result: Optional[bool] = False
+        try:
+            result = self._run_attempt(key, url, path, attempt, future)
+        except Exception as e:
+            # Bookkeeping after the fetch failed (e.g. the journal's disk is full)
+            reason = f"{type(e).__name__}: {e}"
+            print_info(f"Attempt {attempt}/{self.attempts} failed for {url}: {reason}")
+            try:
+                self.journal.record(key, FAILED, url, attempt=attempt, reason=reason)
+            except Exception:
+                pass
+        finally:
+            if result is not None and not future.done():
+                future.set_result(result)
+
+    def _run_attempt(self, key: ItemKey, url: str, path: str, attempt: int, future: Future) -> Optional[bool]:
+        """True when saved, False when out of attempts, None when a retry has been queued."""
+        self.journal.record(key, IN_FLIGHT, url, attempt=attempt)
+        decade, year, name = key
+        start = time.perf_counter()
+        try:
+            _fetch_once(url, path, self.session, self.scheduler, self.store, self.segment_size, self.metrics)
         except Exception as e:
-            print_info(f"Attempt {attempt}/{attempts} failed for {pdf_url}: {e}")
-            time.sleep(min(2 * attempt, 10))
-    return False
+            reason = f"{type(e).__name__}: {e}"
+            print_info(f"Attempt {attempt}/{self.attempts} failed for {url}: {e}")
+            self.journal.record(key, FAILED, url, attempt=attempt, reason=reason)
+            self.metrics.event(
+                "attempt_failed", decade=decade, year=year, name=name, url=url, attempt=attempt, reason=reason,
+                seconds=round(time.perf_counter() - start, 3),
+            )
+            if client_error(e) is not None:
+                # 404, 403, ...: asking again will not change the answer
+                self.refused.add(key)
+                return False
+            if attempt >= self.attempts:
+                return False
+            delay = backoff_delay(attempt, getattr(e, "retry_after", None))
+            self.metrics.inc(RETRIES)
+            self.retries.push(delay, lambda: self._attempt(key, url, path, attempt + 1, future))
+            return None
+        seconds = time.perf_counter() - start
+        self.journal.record(key, DONE, url, attempt=attempt)
+        self.metrics.inc(FILES, outcome="done")
+        self.metrics.observe(DOWNLOAD_SECONDS, seconds)
+        self.metrics.event(
+            "file_done", decade=decade, year=year, name=name, url=url, attempt=attempt,
+            bytes=os.path.getsize(path), seconds=round(seconds, 3),
+        )
+        print_info(f"Saved: {path}")
+        return True
+
+    def close(self) -> None:
+        self.retries.close()
+
+
+def _index_existing(store: ContentStore, pdf_path: str, url: Optional[str]) -> None:
+    """
+    Bring a PDF found on disk (from an older run or the pre-store tool) into the content
+    index with its URL, so revalidation can check it; adds the URL to rows adopted without one.
+    """
+    url = url if url and url.lower().endswith(".pdf") else None
+    entry = store.lookup(pdf_path)
+    if entry is None:
+        store.adopt(pdf_path, url)
+    elif url and not entry["url"]:
+        store.set_url(pdf_path, url)
 
 
 def _desired_filename(i: int, display_num: str) -> str:
@@ -49,49 +404,264 @@ def _desired_filename(i: int, display_num: str) -> str:
     return f"{file_base}.pdf"
 
 
-def download_all_pdfs(structure: Dict[str, Dict[str, List[Tuple[str, str]]]], base_dir: str) -> None:
+def iter_records(structure: Dict[str, Dict[str, List[Tuple[str, str]]]]) -> Iterator[Tuple[str, str, str, str]]:
+    """Flatten a crawled structure into (decade, year, display_num, url) records."""
     for decade, years in structure.items():
         for year, pdf_tuples in years.items():
-            year_dir = os.path.join(base_dir, sanitize_filename(decade), sanitize_filename(year))
-            os.makedirs(year_dir, exist_ok=True)
+            for display_num, url in pdf_tuples:
+                yield decade, year, display_num, url
 
-            # First pass: attempt all
-            total = len(pdf_tuples)
-            for i, (display_num, url) in enumerate(pdf_tuples):
-                pdf_filename = _desired_filename(i, display_num)
-                pdf_path = os.path.join(year_dir, pdf_filename)
 
-                if os.path.exists(pdf_path):
-                    print_info(f"Exists, skip: {pdf_path}")
-                    continue
+def download_stream(
+    records: Iterable[Tuple[str, str, str, str]],
+    base_dir: str,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    structure: Optional[Dict[str, Dict[str, List[Tuple[str, str]]]]] = None,
+    store: Optional[ContentStore] = None,
+    scheduler: Optional[HostScheduler] = None,
+    journal: Optional[DownloadJournal] = None,
+    segment_size: Optional[int] = None,
+    metrics: Optional[Metrics] = None,
+) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+    """
+    Download (decade, year, display_num, url) records into base_dir/decade/year/N.pdf as they
+    arrive, e.g. straight from crawler.iter_gazette_items, so downloads overlap the crawl.
+    At most `queue_size` downloads are queued or running; beyond that the producer waits.
+    Once the stream ends, each year is verified, missing files retried once and a
+    "DONE x/y" line printed, in order of first appearance.
+    Item states go to a DownloadJournal (by default base_dir/download_journal.jsonl): a
+    file the journal marks done is skipped after a stat, without reading it, and the
+    verification and the per-year report come from the journal instead of directory scans.
+    Records are collected into `structure` (pass a skeleton to fix year order or report
+    empty years) which is returned.
+    Downloads are hashed into a ContentStore (by default one rooted at base_dir).
+    Requests are admitted by `scheduler` (by default an adaptive HostScheduler capped at
+    per_host); failed attempts are retried later from a deferred queue, not in place.
+    With a segment_size, files larger than that are fetched as parallel byte ranges where
+    the server supports them, and retries fetch only the ranges still missing.
+    Files per outcome, bytes, retries, HTTP statuses and download latency are counted in
+    `metrics` (see metrics.py), with a "year_downloaded" event per year.
+    """
+    collected: Dict[str, Dict[str, List[Tuple[str, str]]]] = structure if structure is not None else {}
+    store = store or ContentStore(base_dir)
+    scheduler = scheduler or _default_scheduler(per_host)
+    metrics = metrics or Metrics()
+    owns_journal = journal is None
+    journal = journal or DownloadJournal(base_dir)
+    session = _build_session(workers)
+    slots = threading.BoundedSemaphore(max(1, workers, queue_size))
 
-                if not url or not url.lower().endswith(".pdf"):
-                    print_info(f"Skip, not a direct PDF URL (expected .pdf): {url}")
-                    continue
+    def year_dir_for(decade: str, year: str) -> str:
+        return os.path.join(base_dir, sanitize_filename(decade), sanitize_filename(year))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        runner = _DownloadRunner(pool, session, scheduler, store, journal, segment_size=segment_size, metrics=metrics)
+        # First pass: attempt all, as records arrive
+        year_futures: Dict[Tuple[str, str], List[Future]] = {}
+        for decade, years in collected.items():
+            for year in years:
+                os.makedirs(year_dir_for(decade, year), exist_ok=True)
+                year_futures[(decade, year)] = []
+
+        for decade, year, display_num, url in records:
+            pdf_tuples = collected.setdefault(decade, {}).setdefault(year, [])
+            year_dir = year_dir_for(decade, year)
+            if (decade, year) not in year_futures:
+                os.makedirs(year_dir, exist_ok=True)
+                year_futures[(decade, year)] = []
+            i = len(pdf_tuples)
+            pdf_tuples.append((display_num, url))
+
+            pdf_filename = _desired_filename(i, display_num)
+            pdf_path = os.path.join(year_dir, pdf_filename)
+            key = (decade, year, pdf_filename)
+
+            entry = journal.entry(key)
+            if entry is not None and entry["state"] == DONE and _is_valid_pdf(pdf_path, store):
+                if entry.get("reason") == ALREADY_PRESENT:
+                    _index_existing(store, pdf_path, url)
+                metrics.inc(FILES, outcome="present")
+                print_info(f"Done (journal), skip: {pdf_path}")
+                continue
+            if _is_valid_pdf(pdf_path, store):
+                _index_existing(store, pdf_path, url)
+                journal.record(key, DONE, url, reason=ALREADY_PRESENT)
+                metrics.inc(FILES, outcome="present")
+                print_info(f"Exists, skip: {pdf_path}")
+                continue
+            if os.path.exists(pdf_path):
+                print_info(f"Exists but not a valid PDF, re-downloading: {pdf_path}")
+
+            if not url or not url.lower().endswith(".pdf"):
+                journal.record(key, SKIPPED, url, reason="not a direct PDF URL")
+                metrics.inc(FILES, outcome="skipped")
+                print_info(f"Skip, not a direct PDF URL (expected .pdf): {url}")
+                continue
+
+            print_info(f"Downloading PDF from: {url}")
+            slots.acquire()
+            future = runner.submit(key, url, pdf_path)
+            future.add_done_callback(lambda _: slots.release())
+            year_futures[(decade, year)].append(future)
+
+        for decade, years in collected.items():
+            for year, pdf_tuples in years.items():
+                year_dir = year_dir_for(decade, year)
+                wait(year_futures.get((decade, year), []))
+
+                # Verify against the journal and retry missing once
+                names = [_desired_filename(i, dn) for i, (dn, _) in enumerate(pdf_tuples)]
+                expected = [
+                    (name, url) for name, (_, url) in zip(names, pdf_tuples) if url and url.lower().endswith(".pdf")
+                ]
+                missing = [(name, url) for name, url in expected if journal.state((decade, year, name)) != DONE]
+                refused = [(name, url) for name, url in missing if (decade, year, name) in runner.refused]
+                missing = [item for item in missing if item not in refused]
+                if missing:
+                    print_info(f"VERIFY: {len(expected) - len(missing) - len(refused)}/{len(expected)} downloaded for {decade}/{year}. Retrying {len(missing)} missing...")
+                    retries: List[Future] = []
+                    for name, url in missing:
+                        print_info(f"Retry downloading PDF from: {url}")
+                        retries.append(runner.submit((decade, year, name), url, os.path.join(year_dir, name)))
+                    wait(retries)
+
+                # Final report per year
+                counts = journal.year_counts(decade, year, [name for name, _ in expected])
+                print_info(f"DONE {decade}/{year}: {counts[DONE]}/{len(expected)} files present")
+                metrics.event(
+                    "year_downloaded", decade=decade, year=year, expected=len(expected),
+                    done=counts[DONE], failed=counts[FAILED],
+                )
+                for name, _ in expected:
+                    entry = journal.entry((decade, year, name))
+                    if entry is not None and entry["state"] == FAILED:
+                        metrics.inc(FILES, outcome="failed")
+                        print_info(f"FAILED {decade}/{year}/{name} after {entry.get('attempt')} attempt(s): {entry.get('reason')}")
+        runner.close()
+    if owns_journal:
+        journal.close()
+
+    return collected
+
+
+def download_all_pdfs(
+    structure: Dict[str, Dict[str, List[Tuple[str, str]]]],
+    base_dir: str,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    scheduler: Optional[HostScheduler] = None,
+    segment_size: Optional[int] = None,
+) -> None:
+    """
+    Download every PDF in `structure` into base_dir/decade/year/N.pdf.
+    With workers > 1 the first pass of every year is queued on a thread pool up front,
+    so a slow file never blocks the rest; retry backoffs occupy no worker at all. Verification, retry of
+    missing files and the "DONE x/y" report still happen per year, in structure order.
+    """
+    skeleton = {decade: {year: [] for year in years} for decade, years in structure.items()}
+    download_stream(
+        iter_records(structure), base_dir, workers, per_host,
+        structure=skeleton, scheduler=scheduler, segment_size=segment_size,
+    )
+
+
+def _revalidate_one(
+    entry: Dict[str, object],
+    session: requests.Session,
+    scheduler: HostScheduler,
+    store: ContentStore,
+    metrics: Optional[Metrics] = None,
+) -> str:
+    """Check one indexed file against the server; re-fetch it only if it changed. Returns the outcome."""
+    url = entry["url"]
+    pdf_path = str(entry["pdf_path"])
+    if not url:
+        return "skipped"
+    present = _is_valid_pdf(pdf_path, store)
+    headers: Dict[str, str] = {}
+    if present and entry.get("etag"):
+        headers["If-None-Match"] = str(entry["etag"])
+    if present and entry.get("last_modified"):
+        headers["If-Modified-Since"] = str(entry["last_modified"])
+
+    # Without stored validators (e.g. a file adopted from an older mirror) a same-size HEAD
+    # proves nothing: fetch it once and compare hashes; the validators it brings are kept
+    with scheduler.slot(url) as slot:
+        with session.get(url, headers=headers, timeout=60, stream=True) as resp:
+            _check_response(resp, slot, metrics)
+            if resp.status_code == 304:
+                store.mark_checked(pdf_path, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+                return "unchanged"
+            resp.raise_for_status()
+            _stream_to_file(resp, pdf_path, store, metrics)
+
+    current = store.lookup(pdf_path)
+    if present and current is not None and current["sha256"] == entry["sha256"]:
+        return "unchanged"
+    print_info(f"Updated: {pdf_path}")
+    return "updated"
+
+
+def revalidate_pdfs(
+    base_dir: str,
+    workers: int = DEFAULT_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    store: Optional[ContentStore] = None,
+    scheduler: Optional[HostScheduler] = None,
+    metrics: Optional[Metrics] = None,
+) -> Dict[str, int]:
+    """
+    Freshness check of every file in the content index under base_dir.
+    Each file gets a conditional GET (If-None-Match / If-Modified-Since from the stored
+    ETag / Last-Modified); only files the server reports as changed are downloaded again
+    (atomically, through the store). A file with no recorded validators is fetched once and
+    compared by hash, which also records its validators for the next check.
+    Requests run concurrently on `workers` threads. A check that fails for any reason but a
+    client error (404, 403, ...) is retried from a RetryQueue after its backoff (or the
+    server's Retry-After), up to DOWNLOAD_ATTEMPTS times. Returns counts per outcome.
+    """
+    store = store or ContentStore(base_dir)
+    scheduler = scheduler or _default_scheduler(per_host)
+    session = _build_session(workers)
+    counts = {"unchanged": 0, "updated": 0, "failed": 0, "skipped": 0}
+
+    def check(entry: Dict[str, object], attempt: int, future: Future) -> None:
+        outcome: Optional[str] = "failed"
+        try:
+            outcome = _revalidate_one(entry, session, scheduler, store, metrics)
+        except Exception as e:
+            print_info(f"Revalidation attempt {attempt}/{DOWNLOAD_ATTEMPTS} failed for {entry['url']}: {e}")
+            if attempt < DOWNLOAD_ATTEMPTS and client_error(e) is None:
+                if metrics is not None:
+                    metrics.inc(RETRIES)
+                retries.push(
+                    backoff_delay(attempt, getattr(e, "retry_after", None)),
+                    lambda: check(entry, attempt + 1, future),
+                )
+                outcome = None
+        finally:
+            if outcome is not None and not future.done():
+                future.set_result(outcome)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        retries = RetryQueue(lambda job: pool.submit(job))
+        futures: List[Future] = []
+        for entry in store.entries():
+            future: Future = Future()
+            pool.submit(check, entry, 1, future)
+            futures.append(future)
+        wait(futures)
+        retries.close()
+        for future in futures:
+            outcome = future.result()
+            counts[outcome] += 1
+            if metrics is not None:
+                metrics.inc(REVALIDATED, outcome=outcome)
 
-                print_info(f"Downloading PDF from: {url}")
-                _download_to_path(url, pdf_path)
-
-            # Verify and retry missing once
-            existing = {name for name in os.listdir(year_dir) if name.lower().endswith(".pdf")}
-            expected = { _desired_filename(i, dn) for i, (dn, _) in enumerate(pdf_tuples) if _ and str(_) }
-            # The expected set above includes only entries that had tuples; but we only can download those with .pdf URLs
-            # Build expected only from tuples that have .pdf URLs
-            expected = { _desired_filename(i, dn) for i, (dn, u) in enumerate(pdf_tuples) if u and u.lower().endswith('.pdf') }
-            missing = sorted(expected - existing)
-            if missing:
-                print_info(f"VERIFY: {len(existing)}/{len(expected)} downloaded for {decade}/{year}. Retrying {len(missing)} missing...")
-                for i, (display_num, url) in enumerate(pdf_tuples):
-                    pdf_filename = _desired_filename(i, display_num)
-                    if pdf_filename not in missing:
-                        continue
-                    if not url or not url.lower().endswith(".pdf"):
-                        print_info(f"Retry skip, not a direct PDF URL: {url}")
-                        continue
-                    pdf_path = os.path.join(year_dir, pdf_filename)
-                    print_info(f"Retry downloading PDF from: {url}")
-                    _download_to_path(url, pdf_path)
-
-            # Final report per year
-            final_existing = [name for name in os.listdir(year_dir) if name.lower().endswith(".pdf")]
-            print_info(f"DONE {decade}/{year}: {len(final_existing)}/{len(expected)} files present")
+    print_info(
+        f"REVALIDATE {base_dir}: {counts['unchanged']} unchanged, {counts['updated']} updated, "
+        f"{counts['failed']} failed, {counts['skipped']} skipped"
+    )
+    return counts
@@ -0,0 +1,556 @@
+import argparse
+import base64
+import hashlib
+import html
+import json
+import random
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+
+# 1x1 transparent PNG served for decade tiles and card covers
+_PNG = bytes.fromhex(
+    "89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489"
+    "0000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+_LANDING_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Official Gazette (fixture)</title></head>
+<body>
+<div id="decades" class="owl-carousel">__TILES__</div>
+<div id="decade-nav" class="owl-nav"><div class="owl-next">&rsaquo;</div></div>
+<div id="years"></div>
+<div id="cards" class="owl-carousel"></div>
+<div id="card-nav" class="owl-nav" style="display:none"><div class="owl-next">&rsaquo;</div></div>
+<script>
+const DATA = __DATA__;
+__LOAD_YEAR__
+const PAGE_SIZE = __PAGE_SIZE__;
+const DELAY = __DELAY__;
+let items = [];
+let page = 0;
+
+function renderCards() {
+    document.getElementById("cards").innerHTML = items.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).map(
+        ([num, href, cover]) =>
+            `<a href="${href}"><div class="_df_book-cover thumb-div">` +
+            `<img src="${cover}"><span class="_df_book-No">${num}</span></div></a>`
+    ).join("");
+}
+
+function openYear(year) {
+    setTimeout(() => loadYear(year, list => {
+        items = list;
+        page = 0;
+        renderCards();
+        document.getElementById("card-nav").style.display = items.length > PAGE_SIZE ? "" : "none";
+    }), DELAY);
+}
+
+function openDecade(code) {
+    // The decade carousel's own nav is hidden once a decade is open, as the card carousel takes over
+    document.getElementById("decade-nav").style.display = "none";
+    setTimeout(() => {
+        const years = DATA.decades[code] || [];
+        const box = document.getElementById("years");
+        box.innerHTML = years.map(y => `<span class="year" data-value="year_${y}">${y}</span>`).join(" ");
+        box.querySelectorAll("span[data-value]").forEach(span =>
+            span.addEventListener("click", () => openYear(span.dataset.value.slice(5))));
+    }, DELAY);
+}
+
+document.querySelector("#card-nav .owl-next").addEventListener("click", () => {
+    if ((page + 1) * PAGE_SIZE < items.length) {
+        page += 1;
+        setTimeout(renderCards, DELAY);
+    }
+});
+__DECADE_FUNCS__
+</script>
+</body></html>
+"""
+
+_LOAD_YEAR_JS = {
+    "embedded": "function loadYear(year, done) { done(DATA.years[year] || []); }",
+    "opaque": "function loadYear(year, done) { done(DATA.years[year] || []); }",
+    "ajax": (
+        "function loadYear(year, done) {\n"
+        '    fetch("GazetteData.ashx?year=" + year).then(r => r.json()).then(d => done(d.items));\n'
+        "}"
+    ),
+}
+
+_YEAR_PAGE_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Official Gazette __YEAR__ (fixture)</title></head>
+<body>
+<div id="cards">__CARDS__</div>
+__NEXT__
+</body></html>
+"""
+
+_VIEWER_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>PDF Viewer (fixture)</title></head>
+<body>
+__BODY__
+<div id="toolbar"></div>
+<script>
+setTimeout(() => {
+    const a = document.createElement("a");
+    a.className = "df-ui-download";
+    a.href = __PDF__;
+    a.textContent = "Download";
+    document.getElementById("toolbar").appendChild(a);
+}, __DELAY__);
+</script>
+</body></html>
+"""
+
+
+_TOPICS = (
+    "Decree concerning the regulation of ports and free zones.",
+    "Law on commercial companies and their registration.",
+    "Resolution on public health inspections.",
+    "Decree on the land registry and real estate transactions.",
+)
+
+
+def _build_pdf(text: str, padding: bytes) -> bytes:
+    """A minimal one-page PDF showing `text`, with `padding` in an unreferenced stream object."""
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    content = f"BT /F1 12 Tf 72 720 Td ({escaped}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+        b"<< /Length %d >>\nstream\n" % len(padding) + padding + b"\nendstream",
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    return bytes(out)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request: object, client_address: Tuple[str, int]) -> None:
+        # Clients dropping pooled keep-alive connections is routine, not worth a traceback
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FixtureSite:
+    """
+    Offline stand-in for the Official Gazette site, served on 127.0.0.1.
+
+    Mirrors the structure the crawler relies on: `div.years_col[onclick*='decade_XXXX']` tiles,
+    `span[data-value='year_YYYY']` tabs, `_df_book-cover` cards paginated by an `owl-next`
+    carousel, `PDFViewer.aspx?file=` pages whose `.df-ui-download` link is added by script,
+    and synthetic PDFs with configurable size, latency and failure rate.
+
+    throttle_above makes the PDF endpoint behave like a rate-limited host: a request arriving
+    while more than that many PDF requests are in flight is answered 429, with a Retry-After
+    of retry_after seconds when set.
+
+    PDFs honour single-range "Range: bytes=a-b" requests (with If-Range) unless ranges=False;
+    bandwidth caps each PDF response at that many bytes per second.
+
+    viewer_mode controls how much work resolving a viewer URL takes:
+      "query" - file= is the PDF path itself (resolvable without a request)
+      "html"  - file= is an opaque id; the viewer HTML names the PDF in a data attribute
+      "js"    - file= is an opaque id; only the script-inserted .df-ui-download link has it
+
+    listing_mode controls where the carousel's year listings come from:
+      "embedded" - a JSON literal in the landing page script
+      "ajax"     - fetched per year from GazetteData.ashx?year=YYYY (JSON)
+      "opaque"   - an encoded blob only the page's script can read
+    year_pages additionally serves server-rendered listings at OfficialGazette.aspx?year=YYYY
+    (page_size cards per page, linked with rel="next").
+    """
+
+    def __init__(
+        self,
+        decades: Iterable[Tuple[str, str, Iterable[int]]] = (("2000s", "2000", range(2000, 2003)),),
+        issues_per_year: int = 12,
+        page_size: int = 6,
+        pdf_size: int = 256 * 1024,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        throttle_above: Optional[int] = None,
+        retry_after: Optional[int] = None,
+        ranges: bool = True,
+        bandwidth: Optional[float] = None,
+        ui_delay: float = 0.05,
+        viewer_mode: str = "query",
+        listing_mode: str = "embedded",
+        year_pages: bool = False,
+        seed: int = 0,
+        port: int = 0,
+    ) -> None:
+        self.decades = [(label, code, [int(y) for y in years]) for label, code, years in decades]
+        self.issues_per_year = issues_per_year
+        self.page_size = page_size
+        self.pdf_size = pdf_size
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.throttle_above = throttle_above
+        self.retry_after = retry_after
+        self.ranges = ranges
+        self.bandwidth = bandwidth
+        self.ui_delay = ui_delay
+        self.viewer_mode = viewer_mode
+        self.listing_mode = listing_mode
+        self.year_pages = year_pages
+        self._rng = random.Random(seed)
+        # name -> revision; bumping it changes the PDF body, ETag and Last-Modified
+        self.revisions: Dict[str, int] = {}
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self._pdf_in_flight = 0
+        self._server = _Server(("127.0.0.1", port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    # --- data -----------------------------------------------------------------------------
+
+    @property
+    def root(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.root}/ar/Pages/OfficialGazette.aspx?lang=en"
+
+    def pdf_name(self, year: int, num: int) -> str:
+        return f"OGD_{year}_{num}.pdf"
+
+    def viewer_url(self, year: int, num: int) -> str:
+        if self.viewer_mode == "query":
+            file_value = quote(f"/Gazette/{self.pdf_name(year, num)}")
+        else:
+            file_value = f"doc-{year}-{num}"
+        return f"{self.root}/ar/Pages/PDFViewer.aspx?file={file_value}"
+
+    def pdf_url(self, year: int, num: int) -> str:
+        return f"{self.root}/Gazette/{self.pdf_name(year, num)}"
+
+    def expected_structure(self) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+        """What a correct crawl of this site returns."""
+        return {
+            label: {
+                str(year): [(str(num), self.pdf_url(year, num)) for num in range(1, self.issues_per_year + 1)]
+                for year in years
+            }
+            for label, _, years in self.decades
+        }
+
+    def revise(self, year: int, num: int) -> None:
+        """Simulate the site replacing an issue with a corrected version."""
+        name = self.pdf_name(year, num)
+        with self._lock:
+            self.revisions[name] = self.revisions.get(name, 0) + 1
+
+    def pdf_validators(self, name: str) -> Tuple[str, str]:
+        """(ETag, Last-Modified) for the current revision of `name`."""
+        revision = self.revisions.get(name, 0)
+        etag = '"' + hashlib.sha256(f"{name}:{revision}:{self.pdf_size}".encode()).hexdigest()[:16] + '"'
+        return etag, formatdate(self.started_at - 86400 + revision * 60, usegmt=True)
+
+    def pdf_text(self, name: str) -> str:
+        """The searchable text on the single page of `name`'s PDF."""
+        revision = self.revisions.get(name, 0)
+        topic = _TOPICS[hashlib.sha256(name.encode()).digest()[0] % len(_TOPICS)]
+        return f"Official Gazette {name[:-4]} revision {revision}. {topic}"
+
+    def pdf_bytes(self, name: str) -> bytes:
+        """Deterministic, distinct, text-bearing PDF for `name`, padded to pdf_size bytes where possible."""
+        block = hashlib.sha256(name.encode()).digest() * 128
+        pad_len = 0
+        for _ in range(4):
+            padding = (block * (pad_len // len(block) + 1))[:pad_len]
+            pdf = _build_pdf(self.pdf_text(name), padding)
+            if len(pdf) == self.pdf_size or pad_len + self.pdf_size - len(pdf) < 0:
+                break
+            pad_len += self.pdf_size - len(pdf)
+        return pdf
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def _count_bytes(self, n: int) -> None:
+        with self._lock:
+            self.counters["pdf_bytes"] = self.counters.get("pdf_bytes", 0) + n
+
+    def _enter_pdf(self) -> bool:
+        """Count a PDF request in; False if it is over throttle_above and must get a 429."""
+        with self._lock:
+            if self.throttle_above is not None and self._pdf_in_flight >= self.throttle_above:
+                self.counters["pdf_throttled"] = self.counters.get("pdf_throttled", 0) + 1
+                return False
+            self._pdf_in_flight += 1
+            return True
+
+    def _leave_pdf(self) -> None:
+        with self._lock:
+            self._pdf_in_flight -= 1
+
+    def _should_fail(self) -> bool:
+        if self.failure_rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < self.failure_rate
+
+    # --- pages ----------------------------------------------------------------------------
+
+    def landing_html(self) -> str:
+        tiles = "".join(
+            f'<div class="years_col" onclick="decade_{code}()"><img src="/img/{label}.png" alt="{label}">'
+            f"<span>{label}</span></div>"
+            for label, code, _ in self.decades
+        )
+        data: Dict[str, object] = {"decades": {code: years for _, code, years in self.decades}}
+        if self.listing_mode != "ajax":
+            data["years"] = {
+                str(year): self.year_items(year) for _, _, years in self.decades for year in years
+            }
+        if self.listing_mode == "opaque":
+            blob = base64.b64encode(json.dumps(data).encode()).decode()
+            data_js = f'JSON.parse(atob("{blob}"))'
+        else:
+            data_js = json.dumps(data)
+        funcs = "\n".join(f'function decade_{code}() {{ openDecade("{code}"); }}' for _, code, _ in self.decades)
+        return (
+            _LANDING_HTML.replace("__TILES__", tiles)
+            .replace("__DATA__", data_js)
+            .replace("__LOAD_YEAR__", _LOAD_YEAR_JS[self.listing_mode])
+            .replace("__PAGE_SIZE__", str(self.page_size))
+            .replace("__DELAY__", str(int(self.ui_delay * 1000)))
+            .replace("__DECADE_FUNCS__", funcs)
+        )
+
+    def year_items(self, year: int) -> List[List[str]]:
+        """[display_num, viewer_url, cover_url] per issue, as the carousel script consumes them."""
+        if not any(year in years for _, _, years in self.decades):
+            return []
+        return [
+            [str(num), self.viewer_url(year, num), f"/img/cover_{year}_{num}.png"]
+            for num in range(1, self.issues_per_year + 1)
+        ]
+
+    def year_page_html(self, year: int, page: int) -> str:
+        items = self.year_items(year)[(page - 1) * self.page_size : page * self.page_size]
+        cards = "".join(
+            f'<a href="{html.escape(href)}"><div class="_df_book-cover thumb-div">'
+            f'<img src="{cover}"><span class="_df_book-No">{num}</span></div></a>'
+            for num, href, cover in items
+        )
+        has_next = page * self.page_size < len(self.year_items(year))
+        next_link = f'<a rel="next" href="?lang=en&amp;year={year}&amp;page={page + 1}">&rsaquo;</a>' if has_next else ""
+        return _YEAR_PAGE_HTML.replace("__YEAR__", str(year)).replace("__CARDS__", cards).replace("__NEXT__", next_link)
+
+    def viewer_html(self, file_value: str) -> Optional[str]:
+        if file_value.lower().endswith(".pdf"):
+            pdf_path = file_value
+        else:
+            try:
+                _, year, num = file_value.split("-")
+                pdf_path = f"/Gazette/{self.pdf_name(int(year), int(num))}"
+            except ValueError:
+                return None
+        body = f'<div class="_df_book" source="{pdf_path}"></div>' if self.viewer_mode != "js" else '<div class="_df_book"></div>'
+        return (
+            _VIEWER_HTML.replace("__BODY__", body)
+            .replace("__PDF__", json.dumps(pdf_path))
+            .replace("__DELAY__", str(int(self.ui_delay * 1000)))
+        )
+
+    # --- server ---------------------------------------------------------------------------
+
+    def _handler_class(self) -> type:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, Nagle + delayed ACK adds ~40 ms per response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str, headers: Optional[Dict[str, str]] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                if self.command == "HEAD":
+                    return
+                if not site.bandwidth or content_type != "application/pdf":
+                    self.wfile.write(body)
+                    return
+                # Per-connection bandwidth cap, as on a slow or distant link
+                step = max(1, int(site.bandwidth / 20))
+                for offset in range(0, len(body), step):
+                    self.wfile.write(body[offset : offset + step])
+                    time.sleep(min(step, len(body) - offset) / site.bandwidth)
+
+            def do_HEAD(self) -> None:
+                self.do_GET()
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                path = unquote(parts.path)
+                if path == "/ar/Pages/OfficialGazette.aspx":
+                    query = parse_qs(parts.query)
+                    if site.year_pages and (query.get("year") or [""])[0].isdigit():
+                        site._count("listing")
+                        page = int((query.get("page") or ["1"])[0] or 1)
+                        body = site.year_page_html(int(query["year"][0]), max(1, page))
+                        return self._send(200, body.encode(), "text/html; charset=utf-8")
+                    site._count("landing")
+                    return self._send(200, site.landing_html().encode(), "text/html; charset=utf-8")
+                if path == "/ar/Pages/GazetteData.ashx" and site.listing_mode == "ajax":
+                    site._count("listing")
+                    year = (parse_qs(parts.query).get("year") or [""])[0]
+                    items = site.year_items(int(year)) if year.isdigit() else []
+                    return self._send(200, json.dumps({"year": year, "items": items}).encode(), "application/json")
+                if path == "/ar/Pages/PDFViewer.aspx":
+                    site._count("viewer")
+                    viewer_page = site.viewer_html((parse_qs(parts.query).get("file") or [""])[0])
+                    if viewer_page is None:
+                        return self._send(404, b"unknown document", "text/plain")
+                    return self._send(200, viewer_page.encode(), "text/html; charset=utf-8")
+                if path.startswith("/img/"):
+                    site._count("image")
+                    return self._send(200, _PNG, "image/png")
+                if path.startswith("/Gazette/") and path.lower().endswith(".pdf"):
+                    site._count("pdf")
+                    if not site._enter_pdf():
+                        headers = {"Retry-After": str(site.retry_after)} if site.retry_after is not None else None
+                        return self._send(429, b"too many requests", "text/plain", headers)
+                    try:
+                        return self._serve_pdf(path)
+                    finally:
+                        site._leave_pdf()
+                self._send(404, b"not found", "text/plain")
+
+            def _serve_pdf(self, path: str) -> None:
+                if site.latency:
+                    time.sleep(site.latency)
+                if site._should_fail():
+                    site._count("pdf_failed")
+                    return self._send(503, b"try again", "text/plain")
+                name = path.rsplit("/", 1)[-1]
+                etag, last_modified = site.pdf_validators(name)
+                validators = {"ETag": etag, "Last-Modified": last_modified}
+                if_none_match = self.headers.get("If-None-Match")
+                if_modified_since = self.headers.get("If-Modified-Since")
+                if (if_none_match and if_none_match == etag) or (
+                    not if_none_match and if_modified_since and if_modified_since == last_modified
+                ):
+                    site._count("pdf_not_modified")
+                    return self._send(304, b"", "application/pdf", validators)
+                body = site.pdf_bytes(name)
+                status = 200
+                headers = dict(validators, **({"Accept-Ranges": "bytes"} if site.ranges else {}))
+                byte_range = self._byte_range(len(body), etag, last_modified) if site.ranges else None
+                if byte_range == "unsatisfiable":
+                    return self._send(416, b"", "application/pdf", dict(headers, **{"Content-Range": f"bytes */{len(body)}"}))
+                if byte_range is not None:
+                    start, end = byte_range
+                    site._count("pdf_ranges")
+                    status = 206
+                    headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                    body = body[start : end + 1]
+                if self.command == "GET":
+                    site._count_bytes(len(body))
+                return self._send(status, body, "application/pdf", headers)
+
+            def _byte_range(self, size: int, etag: str, last_modified: str) -> object:
+                """(start, end) of a satisfiable single "bytes=a-b" Range, "unsatisfiable", or None for the whole body."""
+                value = self.headers.get("Range", "")
+                if_range = self.headers.get("If-Range")
+                if not value.startswith("bytes=") or "," in value or (if_range and if_range not in (etag, last_modified)):
+                    return None
+                first, _, last = value[len("bytes="):].partition("-")
+                try:
+                    if first:
+                        start, end = int(first), min(size - 1, int(last)) if last else size - 1
+                    else:
+                        start, end = max(0, size - int(last)), size - 1
+                except ValueError:
+                    return None
+                return "unsatisfiable" if start >= size or start > end else (start, end)
+
+        return Handler
+
+    def start(self) -> "FixtureSite":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "FixtureSite":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve an offline stand-in of the Official Gazette site.")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--issues", type=int, default=12, help="issues per year")
+    parser.add_argument("--pdf-size", type=int, default=256 * 1024)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each PDF response")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of PDF requests answered 503")
+    parser.add_argument("--throttle-above", type=int, help="answer 429 beyond this many concurrent PDF requests")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds sent with each 429")
+    parser.add_argument("--no-ranges", dest="ranges", action="store_false", help="ignore Range requests")
+    parser.add_argument("--bandwidth", type=float, help="bytes per second per PDF response")
+    parser.add_argument("--viewer-mode", choices=("query", "html", "js"), default="query")
+    parser.add_argument("--listing-mode", choices=("embedded", "ajax", "opaque"), default="embedded")
+    parser.add_argument("--year-pages", action="store_true", help="also serve server-rendered year listings")
+    args = parser.parse_args()
+
+    site = FixtureSite(
+        issues_per_year=args.issues,
+        pdf_size=args.pdf_size,
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        throttle_above=args.throttle_above,
+        retry_after=args.retry_after,
+        ranges=args.ranges,
+        bandwidth=args.bandwidth,
+        viewer_mode=args.viewer_mode,
+        listing_mode=args.listing_mode,
+        year_pages=args.year_pages,
+        port=args.port,
+    ).start()
+    print(f"[INFO] Fixture site at {site.base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
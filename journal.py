@@ -0,0 +1,171 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from utils import print_info
+
+
+JOURNAL_FILENAME = "download_journal.jsonl"
+# Item states, in the order an item normally moves through them
+QUEUED = "queued"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+# fsync the journal at most this often; a crash loses at most this much history, never a line's integrity
+SYNC_INTERVAL = 1.0
+# Rewrite the journal to one line per item once it holds this many lines per item
+COMPACT_RATIO = 4
+
+# (decade, year, filename)
+ItemKey = Tuple[str, str, str]
+
+
+class DownloadJournal:
+    """
+    Append-only JSONL log of download state changes, one line per transition:
+    {"decade", "year", "name", "url", "state", "attempt", "reason", "at"}.
+    Replaying it gives each item's latest state, so a restarted run knows at once what is
+    done, what failed (and why, after how many attempts) and what was skipped, without
+    rescanning the download tree. A torn last line from a crash is ignored on load.
+    """
+
+    def __init__(self, base_dir: str, path: Optional[str] = None) -> None:
+        self.path = path or os.path.join(base_dir, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        self._items: Dict[ItemKey, Dict[str, object]] = {}
+        lines = self._load()
+        if lines > COMPACT_RATIO * max(1, len(self._items)) + 1000:
+            self._compact()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        if self._file.tell() and not self._ends_with_newline():
+            self._file.write("\n")
+        self._synced_at = time.monotonic()
+
+    def _load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        lines = 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                lines += 1
+                try:
+                    rec = json.loads(line)
+                    self._items[(rec["decade"], rec["year"], rec["name"])] = rec
+                except Exception as e:
+                    print_info(f"Journal {self.path}:{line_no} ignored: {e}")
+        return lines
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _compact(self) -> None:
+        """Atomically rewrite the journal with only the latest line per item."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".journal.", suffix=".tmp", dir=directory)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for rec in self._items.values():
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def record(
+        self,
+        key: ItemKey,
+        state: str,
+        url: Optional[str] = None,
+        attempt: Optional[int] = None,
+        reason: Optional[str] = None,
+    ) -> None:
+        decade, year, name = key
+        rec: Dict[str, object] = {"decade": decade, "year": year, "name": name, "url": url, "state": state, "at": time.time()}
+        if attempt is not None:
+            rec["attempt"] = attempt
+        if reason:
+            rec["reason"] = reason
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._items[key] = rec
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if now - self._synced_at >= SYNC_INTERVAL:
+                os.fsync(self._file.fileno())
+                self._synced_at = now
+
+    def state(self, key: ItemKey) -> Optional[str]:
+        with self._lock:
+            rec = self._items.get(key)
+            return None if rec is None else str(rec["state"])
+
+    def entry(self, key: ItemKey) -> Optional[Dict[str, object]]:
+        with self._lock:
+            rec = self._items.get(key)
+            return None if rec is None else dict(rec)
+
+    def year_counts(self, decade: str, year: str, names: Optional[List[str]] = None) -> Dict[str, int]:
+        """Items per latest state for one year; `names` limits it to the items of the current run."""
+        counts = {QUEUED: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0, SKIPPED: 0, "unknown": 0}
+        with self._lock:
+            if names is None:
+                names = [n for d, y, n in self._items if d == decade and y == year]
+            for name in names:
+                rec = self._items.get((decade, year, name))
+                counts[str(rec["state"]) if rec is not None else "unknown"] += 1
+        return counts
+
+    def pending(self) -> List[Dict[str, object]]:
+        """Latest entry of every item that is not done or skipped, i.e. still needs attention."""
+        with self._lock:
+            return [dict(rec) for rec in self._items.values() if rec["state"] not in (DONE, SKIPPED)]
+
+    def summary(self) -> Dict[Tuple[str, str], Dict[str, int]]:
+        with self._lock:
+            years = sorted({(d, y) for d, y, _ in self._items})
+        return {(d, y): self.year_counts(d, y) for d, y in years}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Show download progress recorded in the journal.")
+    parser.add_argument("base_dir", help="download directory holding the journal")
+    parser.add_argument("--journal", help=f"journal path (default: BASE_DIR/{JOURNAL_FILENAME})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.journal or os.path.join(args.base_dir, JOURNAL_FILENAME)):
+        raise SystemExit(f"No journal found under {args.base_dir}")
+    journal = DownloadJournal(args.base_dir, args.journal)
+    try:
+        for (decade, year), counts in journal.summary().items():
+            total = counts[DONE] + counts[FAILED] + counts[QUEUED] + counts[IN_FLIGHT]
+            print_info(
+                f"{decade}/{year}: {counts[DONE]}/{total} done, {counts[FAILED]} failed, "
+                f"{counts[QUEUED] + counts[IN_FLIGHT]} interrupted, {counts[SKIPPED]} skipped"
+            )
+        for rec in journal.pending():
+            detail = f" after {rec['attempt']} attempt(s): {rec.get('reason', '')}" if rec.get("attempt") else ""
+            print_info(f"PENDING {rec['decade']}/{rec['year']}/{rec['name']} [{rec['state']}]{detail} {rec['url'] or ''}")
+    finally:
+        journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+import json
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+import requests
+from bs4 import BeautifulSoup
+
+from resolver import ViewerResolver
+from timing import StepTimer
+from utils import print_info
+
+
+# Browser-free crawl: read the data behind the carousel over plain HTTP, cheapest source first.
+#   1. JSON embedded in the landing page's scripts (year -> list of cards)
+#   2. a per-year list endpoint named in those scripts ("...?year=" + year), JSON or HTML
+#   3. server-rendered year listings (the landing page with ?year=YYYY), following rel="next"
+# Years none of these yield anything for are handed back to the caller for the browser crawl.
+
+_VIEWER_MARKER = "PDFViewer.aspx?file="
+_NUM_SELECTOR = "span._df_book-No, span.num-in-card, span.badge"
+# A string literal naming a URL that takes the year as its last query parameter
+_YEAR_ENDPOINT = re.compile(r"""["']([^"'\s]+[?&]year=)["']""")
+_ASSIGNMENT = re.compile(r"(?:=|:|\()\s*(?=[\[{])")
+_YEAR_KEY = re.compile(r"^(?:year_)?(\d{4})$")
+# Safety cap on rel="next" pages per year
+MAX_YEAR_PAGES = 200
+LISTING_TIMEOUT = 20
+
+# (decade_label, decade_code, years)
+Decades = List[Tuple[str, str, List[int]]]
+Entry = Dict[str, str]
+
+
+def _entry_from(value: object) -> Optional[Entry]:
+    """A card as the page's data has it, [num, href, ...] or {num/number/no, href/url/link}, as {num, href}."""
+    if isinstance(value, dict):
+        href = next((value[k] for k in ("href", "url", "link", "viewer") if isinstance(value.get(k), str)), None)
+        num = next((str(value[k]) for k in ("num", "number", "no", "display") if value.get(k) is not None), "")
+    elif isinstance(value, (list, tuple)):
+        strings = [str(v) for v in value if isinstance(v, (str, int))]
+        href = next((v for v in strings if _VIEWER_MARKER in v or v.lower().endswith(".pdf")), None)
+        num = next((v for v in strings if v.strip().isdigit()), "")
+    else:
+        return None
+    if not href or (_VIEWER_MARKER not in href and not href.lower().endswith(".pdf")):
+        return None
+    return {"num": num.strip(), "href": href}
+
+
+def _years_in(data: object, found: Dict[str, List[Entry]]) -> None:
+    """Walk parsed script data for objects keyed by year whose values are lists of cards."""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            match = _YEAR_KEY.match(str(key))
+            if match and isinstance(value, list):
+                entries = [e for e in (_entry_from(v) for v in value) if e]
+                if entries or not value:
+                    found.setdefault(match.group(1), []).extend(entries)
+                    continue
+            _years_in(value, found)
+    elif isinstance(data, list):
+        for value in data:
+            _years_in(value, found)
+
+
+def embedded_listings(html: str) -> Dict[str, List[Entry]]:
+    """Year -> cards from JSON literals in the page's inline scripts (empty if there are none)."""
+    found: Dict[str, List[Entry]] = {}
+    decoder = json.JSONDecoder()
+    for script in BeautifulSoup(html, "html.parser").find_all("script"):
+        text = script.string or ""
+        if _VIEWER_MARKER not in text and ".pdf" not in text.lower():
+            continue
+        for match in _ASSIGNMENT.finditer(text):
+            try:
+                data, _ = decoder.raw_decode(text, match.end())
+            except ValueError:
+                continue
+            _years_in(data, found)
+    return found
+
+
+def year_endpoints(html: str, page_url: str) -> List[str]:
+    """Absolute "...?year=" prefixes named in the page's scripts, in order of appearance."""
+    prefixes: List[str] = []
+    for script in BeautifulSoup(html, "html.parser").find_all("script"):
+        for match in _YEAR_ENDPOINT.finditer(script.string or ""):
+            prefix = urljoin(page_url, match.group(1))
+            if prefix not in prefixes:
+                prefixes.append(prefix)
+    return prefixes
+
+
+def cards_from_html(html: str, page_url: str) -> Tuple[List[Entry], Optional[str]]:
+    """Cards of one server-rendered listing page and the absolute rel="next" URL, if any."""
+    soup = BeautifulSoup(html, "html.parser")
+    entries: List[Entry] = []
+    seen = set()
+    for a_tag in soup.select(f"a[href*='{_VIEWER_MARKER}']"):
+        href = urljoin(page_url, a_tag["href"])
+        if href in seen:
+            continue
+        # The card's number label sits inside the anchor, or next to it for overlay anchors
+        label = a_tag.select_one(_NUM_SELECTOR) or (a_tag.parent.select_one(_NUM_SELECTOR) if a_tag.parent else None)
+        seen.add(href)
+        entries.append({"num": label.get_text(strip=True) if label else "", "href": href})
+    next_tag = soup.select_one("a[rel~=next][href], link[rel~=next][href]")
+    return entries, (urljoin(page_url, next_tag["href"]) if next_tag else None)
+
+
+def _with_query(url: str, **params: object) -> str:
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in params]
+    query += [(k, str(v)) for k, v in params.items()]
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class HttpLister:
+    """
+    Year listings of the gazette site without a browser. The landing page is fetched once;
+    each year is then read from the embedded data, a discovered year endpoint, or the
+    server-rendered year pages, whichever answers first.
+    """
+
+    def __init__(self, base_url: str, session: Optional[requests.Session] = None, timeout: float = LISTING_TIMEOUT) -> None:
+        self.base_url = base_url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._landing: Optional[str] = None
+        self._embedded: Dict[str, List[Entry]] = {}
+        self._endpoints: List[str] = []
+        self._landing_cards: List[str] = []
+
+    def _load_landing(self) -> None:
+        with self._lock:
+            if self._landing is not None:
+                return
+            resp = self.session.get(self.base_url, timeout=self.timeout)
+            resp.raise_for_status()
+            self._landing = resp.text
+            self._embedded = embedded_listings(self._landing)
+            self._endpoints = year_endpoints(self._landing, self.base_url)
+            self._landing_cards = sorted(c["href"] for c in cards_from_html(self._landing, self.base_url)[0])
+            if self._embedded:
+                print_info(f"HTTP listing: embedded data for {len(self._embedded)} years")
+            for prefix in self._endpoints:
+                print_info(f"HTTP listing: year endpoint {prefix}<year>")
+
+    def _from_endpoint(self, prefix: str, year: str) -> List[Entry]:
+        resp = self.session.get(prefix + year, timeout=self.timeout)
+        if resp.status_code != 200:
+            return []
+        if "json" in resp.headers.get("Content-Type", ""):
+            found: Dict[str, List[Entry]] = {}
+            data = resp.json()
+            # Either keyed by year like the embedded data, or a bare list of cards for this year
+            _years_in({year: data} if isinstance(data, list) else data, found)
+            if not found and isinstance(data, dict):
+                lists = [v for v in data.values() if isinstance(v, list)]
+                found[year] = [e for v in lists for e in (_entry_from(x) for x in v) if e]
+            return found.get(year, [])
+        return self._from_pages(resp.text, resp.url)
+
+    def _from_pages(self, html: str, url: str) -> List[Entry]:
+        entries: List[Entry] = []
+        seen = set()
+        for _ in range(MAX_YEAR_PAGES):
+            cards, next_url = cards_from_html(html, url)
+            fresh = [c for c in cards if c["href"] not in seen]
+            if not fresh:
+                break
+            entries.extend(fresh)
+            seen.update(c["href"] for c in fresh)
+            if not next_url or next_url == url:
+                break
+            resp = self.session.get(next_url, timeout=self.timeout)
+            if resp.status_code != 200:
+                break
+            html, url = resp.text, resp.url
+        return entries
+
+    def year(self, year: str) -> List[Entry]:
+        """Cards ({num, href}) for one year; empty when no HTTP source has the year."""
+        self._load_landing()
+        if self._embedded.get(year):
+            return list(self._embedded[year])
+        for prefix in self._endpoints:
+            try:
+                entries = self._from_endpoint(prefix, year)
+            except (requests.RequestException, ValueError) as e:
+                print_info(f"HTTP listing: {prefix}{year} failed: {e}")
+                continue
+            if entries:
+                return entries
+        try:
+            page_url = _with_query(self.base_url, year=year)
+            resp = self.session.get(page_url, timeout=self.timeout)
+            # A site that ignores ?year= answers with the landing page again, though rarely byte
+            # for byte (per-request __VIEWSTATE and digest tokens): compare the cards instead
+            cards, _ = cards_from_html(resp.text, resp.url) if resp.status_code == 200 else ([], None)
+            if cards and sorted(c["href"] for c in cards) != self._landing_cards:
+                return self._from_pages(resp.text, resp.url)
+        except requests.RequestException as e:
+            print_info(f"HTTP listing: year page for {year} failed: {e}")
+        return []
+
+
+def crawl_http(
+    base_url: str,
+    decades_to_process: Decades,
+    resolver: ViewerResolver,
+    workers: int,
+    timer: StepTimer,
+    on_item: Callable[[str, str, str, str], None],
+    browser_fallback: bool = False,
+    on_year: Optional[Callable[[str, str], None]] = None,
+) -> Decades:
+    """
+    List and resolve every (decade, year) over plain HTTP, reporting items via on_item like
+    the browser crawl (same numbering, same same-year filter). A year's items are reported
+    once the whole year is resolved. Returns the decades/years for which no item survived
+    the filter: the layout is not what this backend understands. With browser_fallback, a
+    year with any viewer URL that plain HTTP could not resolve is returned too (and nothing
+    of it reported), so the browser crawl, which can open the viewer, takes the whole year;
+    without it, unresolved viewer URLs are reported as they are. on_year(decade, year) is
+    called once each listed year has been reported in full.
+    """
+    session = requests.Session()
+    lister = HttpLister(base_url, session)
+    try:
+        lister._load_landing()
+    except requests.RequestException as e:
+        print_info(f"HTTP listing unavailable ({e}); all years go to the browser")
+        return decades_to_process
+
+    missing: Dict[Tuple[str, str], List[int]] = {}
+    missing_lock = threading.Lock()
+
+    def run_year(label: str, code: str, year: int) -> None:
+        key = f"{label}/{year}"
+        year_str = str(year)
+        with timer.step(key, "http_listing"):
+            entries = lister.year(year_str)
+        items: List[Tuple[str, str]] = []
+        seen = set()
+        unresolved = 0
+        for idx, entry in enumerate(entries):
+            display_num = entry["num"] or str(idx + 1)
+            viewer_url = entry["href"]
+            with timer.step(key, "viewer_resolution"):
+                final_url = resolver.resolve(viewer_url)
+            if not final_url:
+                unresolved += 1
+                if browser_fallback:
+                    continue
+                final_url = viewer_url
+            # Only include PDFs that clearly belong to this year (e.g., OGD_1962_*.pdf)
+            if final_url.lower().endswith(".pdf") and f"_{year_str}_" not in final_url:
+                continue
+            if final_url not in seen:
+                seen.add(final_url)
+                items.append((display_num, final_url))
+        if not items or (unresolved and browser_fallback):
+            if unresolved and browser_fallback:
+                print_info(f"{unresolved} viewer URL(s) for {year_str} not resolvable over HTTP")
+            with missing_lock:
+                missing.setdefault((label, code), []).append(year)
+            return
+        for display_num, final_url in items:
+            on_item(label, year_str, display_num, final_url)
+        print_info(f"Found {len(items)} unique PDFs for {year_str} (HTTP).")
+        if on_year is not None:
+            on_year(label, year_str)
+
+    units = [(label, code, yr) for label, code, years in decades_to_process for yr in years]
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(units) or 1))) as executor:
+        for future in [executor.submit(run_year, *unit) for unit in units]:
+            future.result()
+
+    return [
+        (label, code, sorted(missing[(label, code)]))
+        for label, code, _ in decades_to_process
+        if missing.get((label, code))
+    ]
+
@@ -1,16 +1,337 @@
-from crawler import get_gazette_structure
-from downloader import download_all_pdfs
-from utils import print_info
+import argparse
+import importlib.util
+import os
+import sys
+import threading
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+# Only selenium-free modules at import time: `download` must start without the browser stack.
+# The crawler (selenium, webdriver_manager) and the resolver are imported by the commands that crawl.
+from downloader import download_stream, iter_records, revalidate_pdfs
+from manifest import Manifest, load_manifest, record_structure, stale_decades, to_structure
+from metrics import EVENTS_FILENAME, METRICS_FILENAME, PROGRESS_INTERVAL, Metrics
+from ratelimit import HostScheduler
+from selection import DEFAULT_DECADES, decades_for_years, parse_shard, parse_years, shard_decades, shard_records
+from timing import StepTimer
+from utils import LOG_FORMATS, print_info, set_log_format
 
-if __name__ == "__main__":
-    BASE_DIR = "/Users/karmesh/Desktop/shoura,web scrapping itern/"
-    BASE_URL = "https://dlp.dubai.gov.ae/ar/Pages/OfficialGazette.aspx?lang=en"
 
-    print_info("Starting Gazette Scraper...")
-    structure = get_gazette_structure(BASE_URL)
-    print_info("Crawled structure:")
-    print(structure)
+# Defaults for the command-line options
+BASE_DIR = "/Users/karmesh/Desktop/shoura,web scrapping itern/"
+BASE_URL = "https://dlp.dubai.gov.ae/ar/Pages/OfficialGazette.aspx?lang=en"
+# Parallel downloads; PER_HOST caps in-flight requests to any single host. Below that cap the
+# downloader adapts to the host, backing off on 429/503 and slow responses.
+DOWNLOAD_WORKERS = 8
+PER_HOST = 4
+MAX_RATE = None  # requests per second to the gazette host; None = no pacing
+# Issues larger than this are fetched as parallel byte ranges, resumable range by range (0 = off)
+SEGMENT_MB = 4
+# Crawl manifest: reruns only re-crawl years that are missing or stale (--full forces a full crawl)
+MANIFEST_FILENAME = "manifest.jsonl"
+MAX_AGE = None  # seconds; None = past years never go stale
+CURRENT_YEAR_MAX_AGE = 24 * 3600
+# (decade, year) units crawled in parallel: HTTP listings, or headless browsers on fallback
+CRAWL_WORKERS = 4
+CRAWL_BACKEND = "auto"
+# Memoized PDFViewer.aspx -> direct PDF URL resolutions, reused across runs
+VIEWER_CACHE_FILENAME = "viewer_cache.json"
+# Per-year, per-step crawl timing profile
+TIMING_REPORT_FILENAME = "crawl_timing.json"
+# Processes extracting PDF text for the search index (--index)
+INDEX_WORKERS = os.cpu_count() or 1
+
+COMMANDS = ("crawl", "download", "sync")
+
+Decades = List[Tuple[str, str, List[int]]]
+Structure = Dict[str, Dict[str, List[Tuple[str, str]]]]
+
+
+def _checked(parse: Callable[[str], object]) -> Callable[[str], object]:
+    """Turn a parser's ValueError into an argparse usage error with its own message."""
+    def wrapped(value: str) -> object:
+        try:
+            return parse(value)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e))
+    return wrapped
+
+
+def _selected_decades(args: argparse.Namespace) -> Decades:
+    if args.years:
+        return decades_for_years(args.years)
+    return [(label, code, list(years)) for label, code, years in DEFAULT_DECADES]
+
+
+def _manifest_path(args: argparse.Namespace) -> str:
+    return args.manifest or os.path.join(args.out, MANIFEST_FILENAME)
+
+
+def _skeleton(decades: Iterable[Tuple[str, str, Iterable[int]]]) -> Structure:
+    return {label: {str(yr): [] for yr in years} for label, _, years in decades}
+
+
+def _empty_like(structure: Structure) -> Structure:
+    return {decade: {year: [] for year in years} for decade, years in structure.items()}
+
+
+def _scheduler(args: argparse.Namespace) -> HostScheduler:
+    return HostScheduler(args.per_host, initial_concurrency=max(1, args.per_host // 2), max_rate=args.max_rate)
+
+
+def _segment_size(args: argparse.Namespace) -> Optional[int]:
+    return int(args.segment_mb * 1024 * 1024) or None
+
+
+def _crawl_todo(args: argparse.Namespace, manifest: Manifest, decades: Decades) -> Decades:
+    todo = decades if args.full else stale_decades(
+        manifest, decades, max_age=args.max_age, current_max_age=CURRENT_YEAR_MAX_AGE
+    )
+    if todo:
+        print_info("Crawling: " + ", ".join(f"{label} {years}" for label, _, years in todo))
+    else:
+        print_info(f"Manifest up to date, skipping crawl: {_manifest_path(args)}")
+    return todo
+
+
+def _crawl_kwargs(args: argparse.Namespace, timer: StepTimer, metrics: Metrics) -> Dict[str, object]:
+    from resolver import ViewerResolver
+
+    return {
+        "resolver": ViewerResolver(os.path.join(args.out, VIEWER_CACHE_FILENAME)),
+        "workers": args.crawl_workers,
+        "timer": timer,
+        "keep_warm": args.keep_warm,
+        "backend": args.backend,
+        "metrics": metrics,
+    }
+
+
+def cmd_crawl(args: argparse.Namespace, metrics: Metrics) -> None:
+    """Crawl the selected years (this shard's share of them) into the manifest."""
+    from crawler import get_gazette_structure
 
-    download_all_pdfs(structure, BASE_DIR)
+    decades = shard_decades(_selected_decades(args), args.shard)
+    manifest_path = _manifest_path(args)
+    todo = _crawl_todo(args, load_manifest(manifest_path), decades)
+    if not todo:
+        return
+    timer = StepTimer(metrics)
+    with metrics.phase("crawl"):
+        crawled = get_gazette_structure(args.url, todo, **_crawl_kwargs(args, timer, metrics))
+    timer.write_report(os.path.join(args.out, TIMING_REPORT_FILENAME))
+    record_structure(manifest_path, crawled)
+    found = sum(len(items) for years in crawled.values() for items in years.values())
+    print_info(f"Crawled {found} items in {sum(len(years) for years in crawled.values())} years into {manifest_path}")
+
+
+def _update_search_index(args: argparse.Namespace, metrics: Metrics) -> None:
+    """Optional post-download stage: extract text from new or changed PDFs into the search index."""
+    if not args.index:
+        return
+    from search import SearchIndex
+
+    index = SearchIndex(args.out)
+    try:
+        with metrics.phase("index"):
+            index.update(workers=args.index_workers)
+    finally:
+        index.close()
+
+
+def cmd_download(args: argparse.Namespace, metrics: Metrics) -> None:
+    """Download the selected years from the manifest; with --shard, only this shard's items."""
+    if args.revalidate:
+        with metrics.phase("revalidate"):
+            revalidate_pdfs(
+                args.out, workers=args.workers, per_host=args.per_host, scheduler=_scheduler(args), metrics=metrics,
+            )
+        _update_search_index(args, metrics)
+        return
+    decades = _selected_decades(args)
+    manifest_path = _manifest_path(args)
+    structure = to_structure(load_manifest(manifest_path), decades)
+    if not any(structure.values()):
+        print_info(f"Nothing crawled for the selected years in {manifest_path}; run `crawl` first")
+        return
+    with metrics.phase("download"):
+        download_stream(
+            shard_records(iter_records(structure), args.shard),
+            args.out,
+            workers=args.workers,
+            per_host=args.per_host,
+            structure=_empty_like(structure),
+            scheduler=_scheduler(args),
+            segment_size=_segment_size(args),
+            metrics=metrics,
+        )
+    _update_search_index(args, metrics)
+
+
+def cmd_sync(args: argparse.Namespace, metrics: Metrics) -> None:
+    """Crawl what is stale, then download everything selected; with --shard, this shard's years."""
+    from crawler import get_gazette_structure, iter_gazette_items
+
+    decades = shard_decades(_selected_decades(args), args.shard)
+    manifest_path = _manifest_path(args)
+    manifest = load_manifest(manifest_path)
+    todo = _crawl_todo(args, manifest, decades)
+    timer = StepTimer(metrics)
+    scheduler = _scheduler(args)
+
+    if args.pipeline:
+        # Years still fresh in the manifest are fed first, then crawled years stream in behind them
+        stale = {(label, str(yr)) for label, _, years in todo for yr in years}
+        cached = {
+            decade: {year: items for year, items in years.items() if (decade, year) not in stale}
+            for decade, years in to_structure(manifest, decades).items()
+        }
+        manifest_lock = threading.Lock()
+
+        def crawled(decade: str, year: str, items: List[Tuple[str, str]]) -> None:
+            # Saved as each year completes, so an interrupted sync keeps what it crawled
+            with manifest_lock:
+                record_structure(manifest_path, {decade: {year: items}})
+
+        crawl_stream = (
+            iter_gazette_items(args.url, todo, on_year=crawled, **_crawl_kwargs(args, timer, metrics)) if todo else []
+        )
+        # Crawl and download overlap here, so they are timed as one phase
+        with metrics.phase("crawl_download"):
+            download_stream(
+                chain(iter_records(cached), crawl_stream),
+                args.out,
+                workers=args.workers,
+                per_host=args.per_host,
+                structure=_skeleton(decades),
+                scheduler=scheduler,
+                segment_size=_segment_size(args),
+                metrics=metrics,
+            )
+        if todo:
+            timer.write_report(os.path.join(args.out, TIMING_REPORT_FILENAME))
+        _update_search_index(args, metrics)
+        return
+
+    if todo:
+        with metrics.phase("crawl"):
+            crawled = get_gazette_structure(args.url, todo, **_crawl_kwargs(args, timer, metrics))
+        timer.write_report(os.path.join(args.out, TIMING_REPORT_FILENAME))
+        record_structure(manifest_path, crawled)
+        manifest = load_manifest(manifest_path)
+    structure = to_structure(manifest, decades)
+    with metrics.phase("download"):
+        download_stream(
+            iter_records(structure),
+            args.out,
+            workers=args.workers,
+            per_host=args.per_host,
+            structure=_empty_like(structure),
+            scheduler=scheduler,
+            segment_size=_segment_size(args),
+            metrics=metrics,
+        )
+    _update_search_index(args, metrics)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Crawl the Dubai Official Gazette and download its PDFs.")
+    commands = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--out", default=BASE_DIR, help="download directory; also holds the manifest, caches and reports")
+    common.add_argument(
+        "--years", type=_checked(parse_years),
+        help='decades, ranges and years, e.g. "1960s,2000-2009,2023" (default: 2000s and 2020s)',
+    )
+    common.add_argument("--manifest", help=f"crawl manifest (default: OUT/{MANIFEST_FILENAME}); share it between machines")
+    common.add_argument(
+        "--shard", type=_checked(parse_shard),
+        help="i/n: take a deterministic 1/n of the work, e.g. 0/4 .. 3/4 on four machines",
+    )
+    common.add_argument(
+        "--metrics", help=f"run metrics snapshot (default: OUT/{METRICS_FILENAME}); a .prom path writes Prometheus text",
+    )
+    common.add_argument("--events", help=f"structured JSON event log, appended (default: OUT/{EVENTS_FILENAME})")
+    common.add_argument(
+        "--progress", type=float, default=PROGRESS_INTERVAL, help="seconds between live progress lines (0: off)",
+    )
+    common.add_argument("--log-format", choices=LOG_FORMATS, default="text", help="json: one JSON object per log line")
+
+    crawling = argparse.ArgumentParser(add_help=False)
+    crawling.add_argument("--url", default=BASE_URL, help="gazette landing page")
+    crawling.add_argument("--crawl-workers", type=int, default=CRAWL_WORKERS, help="years crawled in parallel")
+    crawling.add_argument(
+        "--backend", choices=("auto", "http", "browser"), default=CRAWL_BACKEND,
+        help="auto: plain HTTP listing, browser only for years it cannot read; http: never start Chrome",
+    )
+    crawling.add_argument("--full", action="store_true", help="re-crawl every selected year, not just stale ones")
+    crawling.add_argument("--max-age", type=float, default=MAX_AGE, help="seconds after which a crawled year is stale")
+    crawling.add_argument(
+        "--keep-warm", action="store_true",
+        help="leave the browsers running so the next run attaches to them instead of starting Chrome",
+    )
+
+    downloading = argparse.ArgumentParser(add_help=False)
+    downloading.add_argument("--workers", type=int, default=DOWNLOAD_WORKERS, help="parallel downloads")
+    downloading.add_argument("--per-host", type=int, default=PER_HOST, help="max in-flight requests to one host")
+    downloading.add_argument("--max-rate", type=float, default=MAX_RATE, help="max requests per second to one host")
+    downloading.add_argument(
+        "--segment-mb", type=float, default=SEGMENT_MB,
+        help="fetch larger issues as parallel byte ranges of this many MiB, keeping finished ranges across retries (0: off)",
+    )
+    downloading.add_argument(
+        "--index", action="store_true",
+        help="afterwards, extract text from new or changed PDFs into the search index (needs pypdf; see search.py)",
+    )
+    downloading.add_argument("--index-workers", type=int, default=INDEX_WORKERS, help="text extraction processes")
+
+    crawl = commands.add_parser(
+        "crawl", parents=[common, crawling], help="crawl stale years into the manifest (shards split years)",
+    )
+    crawl.set_defaults(func=cmd_crawl)
+    download = commands.add_parser(
+        "download", parents=[common, downloading], help="download from the manifest, no browser (shards split items)",
+    )
+    download.add_argument(
+        "--revalidate", action="store_true",
+        help="instead, check already-downloaded PDFs for changes (conditional GET) and re-fetch changed ones",
+    )
+    download.set_defaults(func=cmd_download)
+    sync = commands.add_parser(
+        "sync", parents=[common, crawling, downloading], help="crawl and download (default; shards split years)",
+    )
+    sync.add_argument(
+        "--no-pipeline", dest="pipeline", action="store_false",
+        help="crawl everything first, then download, instead of downloading while crawling",
+    )
+    sync.set_defaults(func=cmd_sync)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        # No subcommand (bare `python main.py`, or `python main.py --out X`) means sync
+        argv = ["sync"] + argv
+    args = parser.parse_args(argv)
+    if getattr(args, "index", False) and importlib.util.find_spec("pypdf") is None:
+        # Fail before the download, not after it
+        parser.error("--index needs pypdf: pip install pypdf")
+    set_log_format(args.log_format)
+    print_info("Starting Gazette Scraper...")
+    metrics = Metrics(args.events or os.path.join(args.out, EVENTS_FILENAME), progress_interval=args.progress)
+    metrics.event("run_start", command=args.command, out=args.out, years=args.years, shard=args.shard)
+    try:
+        args.func(args, metrics)
+    finally:
+        metrics.event("run_end", command=args.command, seconds=round(metrics.elapsed(), 3))
+        metrics.close()
+        metrics.write(args.metrics or os.path.join(args.out, METRICS_FILENAME))
+        print_info(metrics.progress_line().replace("PROGRESS", "TOTAL", 1))
     print_info("Done.")
+
+
+if __name__ == "__main__":
+    main()
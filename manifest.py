@@ -0,0 +1,112 @@
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import print_info
+
+
+# manifest = { decade: { year: {"crawled_at": epoch_seconds, "items": [(display_num, url), ...]} } }
+Manifest = Dict[str, Dict[str, Dict[str, object]]]
+
+
+def load_manifest(path: str) -> Manifest:
+    """
+    Read a JSONL crawl manifest. Each line is one crawled year; later lines win, so the
+    file can simply be appended to after every crawl. Unreadable lines are skipped.
+    """
+    manifest: Manifest = {}
+    if not os.path.exists(path):
+        return manifest
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+                items = [(str(num), str(url)) for num, url in rec["items"]]
+                manifest.setdefault(rec["decade"], {})[rec["year"]] = {
+                    "crawled_at": float(rec["crawled_at"]),
+                    "items": items,
+                }
+            except Exception as e:
+                print_info(f"Manifest {path}:{line_no} ignored: {e}")
+    return manifest
+
+
+def record_structure(
+    path: str,
+    structure: Dict[str, Dict[str, List[Tuple[str, str]]]],
+    crawled_at: Optional[float] = None,
+) -> None:
+    """Append every year of a freshly crawled structure to the manifest."""
+    crawled_at = time.time() if crawled_at is None else crawled_at
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for decade, years in structure.items():
+            for year, items in years.items():
+                rec = {
+                    "decade": decade,
+                    "year": year,
+                    "crawled_at": crawled_at,
+                    "crawled_at_iso": datetime.fromtimestamp(crawled_at).isoformat(timespec="seconds"),
+                    "items": [list(item) for item in items],
+                }
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def to_structure(
+    manifest: Manifest,
+    decades: Optional[Iterable[Tuple[str, str, Iterable[int]]]] = None,
+) -> Dict[str, Dict[str, List[Tuple[str, str]]]]:
+    """Build the crawler's structure from the manifest, optionally limited to `decades`."""
+    if decades is None:
+        return {
+            decade: {year: list(entry["items"]) for year, entry in sorted(years.items())}
+            for decade, years in manifest.items()
+        }
+    structure: Dict[str, Dict[str, List[Tuple[str, str]]]] = {}
+    for decade_label, _code, year_range in decades:
+        years = manifest.get(decade_label, {})
+        structure[decade_label] = {
+            str(yr): list(years[str(yr)]["items"]) for yr in year_range if str(yr) in years
+        }
+    return structure
+
+
+def stale_decades(
+    manifest: Manifest,
+    decades: Iterable[Tuple[str, str, Iterable[int]]],
+    max_age: Optional[float] = None,
+    current_max_age: float = 24 * 3600,
+    now: Optional[float] = None,
+) -> List[Tuple[str, str, List[int]]]:
+    """
+    Return the subset of `decades` that needs crawling, in the same
+    (decade_label, decade_code, years) shape get_gazette_structure accepts.
+    A year is stale when it is missing, was crawled with no items (a failed crawl),
+    is older than max_age, or is the current (still growing) year and older than current_max_age.
+    """
+    now = time.time() if now is None else now
+    this_year = datetime.fromtimestamp(now).year
+    todo: List[Tuple[str, str, List[int]]] = []
+    for decade_label, decade_code, year_range in decades:
+        known = manifest.get(decade_label, {})
+        stale: List[int] = []
+        for yr in year_range:
+            entry = known.get(str(yr))
+            if entry is None or not entry["items"]:
+                stale.append(yr)
+                continue
+            age = now - float(entry["crawled_at"])
+            if max_age is not None and age > max_age:
+                stale.append(yr)
+            elif yr >= this_year and age > current_max_age:
+                stale.append(yr)
+        if stale:
+            todo.append((decade_label, decade_code, stale))
+    return todo
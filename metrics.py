@@ -0,0 +1,263 @@
+import argparse
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from utils import print_info
+
+
+METRICS_FILENAME = "run_metrics.json"
+EVENTS_FILENAME = "run_events.jsonl"
+# Seconds between live progress lines; 0 turns them off
+PROGRESS_INTERVAL = 10.0
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Metric names shared by the crawler, the downloader and the progress line
+ITEMS_DISCOVERED = "gazette_items_discovered_total"
+CRAWL_STEP_SECONDS = "gazette_crawl_step_seconds"
+HTTP_RESPONSES = "gazette_http_responses_total"
+DOWNLOADED_BYTES = "gazette_downloaded_bytes_total"
+FILES = "gazette_files_total"
+DOWNLOAD_SECONDS = "gazette_download_seconds"
+RETRIES = "gazette_download_retries_total"
+THROTTLED = "gazette_throttled_total"
+REVALIDATED = "gazette_revalidated_total"
+PHASE_SECONDS = "gazette_phase_seconds"
+
+# (name, sorted label pairs)
+SeriesKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def _key(name: str, labels: Dict[str, object]) -> SeriesKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (the largest one for the overflow bucket)."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(LATENCY_BUCKETS, self.counts):
+            seen += n
+            if n and seen >= rank:
+                return bound
+        return self.max
+
+
+class Metrics:
+    """
+    Counters and latency histograms for one run, labelled like Prometheus series
+    (metrics.inc(FILES, outcome="done")), plus structured events: one JSON object per line
+    in events_path, e.g. {"ts", "run", "event": "file_done", "path", "bytes", "seconds"}.
+    At the end of a run write() saves a snapshot as JSON, or in the Prometheus text format
+    when the path ends in .prom (for a node_exporter textfile collector). With a
+    progress_interval, a background thread prints a one-line summary that often.
+    Thread-safe; a Metrics() without paths only keeps numbers in memory.
+    """
+
+    def __init__(self, events_path: Optional[str] = None, progress_interval: float = 0.0) -> None:
+        self.started_at = time.time()
+        self.run_id = time.strftime("%Y%m%dT%H%M%S", time.localtime(self.started_at)) + f"-{os.getpid()}"
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._counters: Dict[SeriesKey, float] = {}
+        self._histograms: Dict[SeriesKey, _Histogram] = {}
+        self._events = None
+        if events_path:
+            os.makedirs(os.path.dirname(os.path.abspath(events_path)), exist_ok=True)
+            self._events = open(events_path, "a", encoding="utf-8")
+        self._stop = threading.Event()
+        self._progress: Optional[threading.Thread] = None
+        if progress_interval > 0:
+            self._progress = threading.Thread(
+                target=self._report_progress, args=(progress_interval,), name="metrics-progress", daemon=True
+            )
+            self._progress.start()
+
+    def inc(self, name: str, value: float = 1, **labels: object) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, seconds: float, **labels: object) -> None:
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(seconds)
+
+    def counter(self, name: str, **labels: object) -> float:
+        """Sum of the counter's series whose labels include `labels` (all series without labels)."""
+        wanted = {(k, str(v)) for k, v in labels.items()}
+        with self._lock:
+            return sum(v for (n, pairs), v in self._counters.items() if n == name and wanted <= set(pairs))
+
+    def event(self, kind: str, **fields: object) -> None:
+        if self._events is None:
+            return
+        line = json.dumps(
+            {"ts": round(time.time(), 3), "run": self.run_id, "event": kind, **fields}, ensure_ascii=False, default=str
+        )
+        with self._lock:
+            if not self._events.closed:
+                self._events.write(line + "\n")
+                self._events.flush()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the run (crawl, download, index) into PHASE_SECONDS and two events."""
+        self.event("phase_start", phase=name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(PHASE_SECONDS, seconds, phase=name)
+            self.event("phase_end", phase=name, seconds=round(seconds, 3))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start
+
+    def progress_line(self) -> str:
+        elapsed = max(self.elapsed(), 1e-9)
+        done = self.counter(FILES, outcome="done")
+        mb = self.counter(DOWNLOADED_BYTES) / (1024 * 1024)
+        return (
+            f"PROGRESS {elapsed:.0f}s: {self.counter(ITEMS_DISCOVERED):.0f} items discovered, "
+            f"{done:.0f} files downloaded ({done / elapsed:.2f}/s), {mb:.1f} MB ({mb / elapsed:.2f} MB/s), "
+            f"{self.counter(FILES, outcome='failed'):.0f} failed, {self.counter(RETRIES):.0f} retries, "
+            f"{self.counter(THROTTLED):.0f} throttled"
+        )
+
+    def _report_progress(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            print_info(self.progress_line())
+
+    def snapshot(self) -> Dict[str, object]:
+        elapsed = self.elapsed()
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(pairs), "value": value}
+                for (name, pairs), value in sorted(self._counters.items())
+            ]
+            histograms = [
+                {
+                    "name": name,
+                    "labels": dict(pairs),
+                    "count": h.count,
+                    "sum": round(h.total, 6),
+                    "max": round(h.max, 6),
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "buckets": dict(zip([str(b) for b in LATENCY_BUCKETS] + ["+Inf"], h.counts)),
+                }
+                for (name, pairs), h in sorted(self._histograms.items())
+            ]
+        return {
+            "run": self.run_id,
+            "started_at": self.started_at,
+            "seconds": round(elapsed, 3),
+            "rates": {
+                "files_per_sec": round(self.counter(FILES, outcome="done") / elapsed, 3) if elapsed else 0.0,
+                "bytes_per_sec": round(self.counter(DOWNLOADED_BYTES) / elapsed, 1) if elapsed else 0.0,
+                "items_discovered_per_sec": round(self.counter(ITEMS_DISCOVERED) / elapsed, 3) if elapsed else 0.0,
+            },
+            "counters": counters,
+            "histograms": histograms,
+        }
+
+    def prometheus(self) -> str:
+        """The snapshot in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE gazette_run_start_time_seconds gauge",
+            f"gazette_run_start_time_seconds {self.started_at:.3f}",
+            "# TYPE gazette_run_seconds gauge",
+            f"gazette_run_seconds {self.elapsed():.3f}",
+        ]
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        typed = set()
+        for (name, pairs), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{_prom_labels(pairs)} {value:.15g}")
+        for (name, pairs), h in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, n in zip([f"{b:g}" for b in LATENCY_BUCKETS] + ["+Inf"], h.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_prom_labels(pairs, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_prom_labels(pairs)} {h.total:.6f}")
+            lines.append(f"{name}_count{_prom_labels(pairs)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Atomically write the snapshot: Prometheus text for *.prom, JSON otherwise."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        body = self.prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=2) + "\n"
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+        print_info(f"Run metrics written to {path}")
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._progress is not None:
+            self._progress.join()
+        with self._lock:
+            if self._events is not None and not self._events.closed:
+                self._events.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Summarize the run metrics written by main.py.")
+    parser.add_argument("path", help=f"metrics JSON (e.g. BASE_DIR/{METRICS_FILENAME})")
+    args = parser.parse_args()
+
+    with open(args.path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    print_info(f"Run {snapshot['run']}: {snapshot['seconds']}s, rates {snapshot['rates']}")
+    for counter in snapshot["counters"]:
+        labels = ",".join(f"{k}={v}" for k, v in counter["labels"].items())
+        print_info(f"{counter['name']}{{{labels}}} = {counter['value']:.15g}")
+    for histogram in snapshot["histograms"]:
+        labels = ",".join(f"{k}={v}" for k, v in histogram["labels"].items())
+        print_info(
+            f"{histogram['name']}{{{labels}}}: n={histogram['count']} sum={histogram['sum']:.2f}s "
+            f"p50<={histogram['p50']}s p95<={histogram['p95']}s max={histogram['max']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
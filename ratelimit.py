@@ -0,0 +1,249 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from utils import print_info
+
+
+# Statuses that mean "slow down" rather than "this request is broken"
+THROTTLE_STATUSES = (429, 503)
+MAX_RETRY_AFTER = 300.0
+# Minimum seconds between two multiplicative decreases for one host
+DECREASE_WINDOW = 1.0
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Retry-After as seconds from now; accepts delta-seconds or an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), MAX_RETRY_AFTER)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return min(max(0.0, when - (time.time() if now is None else now)), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None, base: float = 1.0, cap: float = 60.0) -> float:
+    """Delay before retry number `attempt` (1-based): the server's Retry-After if given, else full-jitter exponential."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def client_error(exc: Optional[BaseException]) -> Optional[int]:
+    """
+    The status of an HTTP error raised for a 4xx answer other than 429 (404, 403, ...), else
+    None. Such an answer is final for that URL and says nothing about the host's load.
+    """
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500 and status not in THROTTLE_STATUSES:
+        return status
+    return None
+
+
+class Throttled(IOError):
+    """The server answered 429/503; retry_after is its Retry-After in seconds, if any."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"throttled with HTTP {status}" + (f", retry after {retry_after:.0f}s" if retry_after is not None else ""))
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _HostState:
+    def __init__(self, scheduler: "HostScheduler") -> None:
+        self.limit = float(scheduler.initial_concurrency)
+        self.rate = scheduler.initial_rate
+        self.tokens = 1.0
+        self.refilled_at = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.latency: Optional[float] = None  # EWMA of healthy request latency
+        self.error_rate = 0.0  # EWMA of hard failures
+        self.decreased_at = 0.0
+
+
+class _Slot:
+    """
+    One admitted request. Leaving the `with` block normally counts as a success (with its
+    latency); an exception counts as an error unless throttled() was called first, or it
+    reports a client error (404, 403, ...): the host answered, so that counts as a success.
+    The latency is the time to the response headers when responded() was called, so that a
+    large body streamed inside the slot is not mistaken for a loaded host.
+    """
+
+    def __init__(self, scheduler: "HostScheduler", host: str) -> None:
+        self._scheduler = scheduler
+        self._host = host
+        self._outcome: Optional[str] = None
+        self._retry_after: Optional[float] = None
+        self._start = 0.0
+        self._latency: Optional[float] = None
+
+    def responded(self) -> None:
+        """Mark the response headers as received; the body may still be streaming."""
+        if self._latency is None:
+            self._latency = time.monotonic() - self._start
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        self._outcome = "throttled"
+        self._retry_after = retry_after
+
+    def __enter__(self) -> "_Slot":
+        self._scheduler._acquire(self._host)
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        failed = exc_type is not None and client_error(exc) is None
+        outcome = self._outcome or ("error" if failed else "ok")
+        latency = self._latency if self._latency is not None else time.monotonic() - self._start
+        self._scheduler._release(self._host, outcome, latency, self._retry_after)
+
+
+class HostScheduler:
+    """
+    Per-host admission control for the downloader.
+
+    - Concurrency follows AIMD: each healthy response (latency within `slow_factor` of the
+      host's running average, low error rate) adds 1/limit to the in-flight limit, up to
+      max_concurrency; a 429/503 halves it and pauses the host for Retry-After (or a short
+      backoff) seconds.
+    - A token bucket paces request starts; its rate also grows additively while healthy and
+      halves on throttling. max_rate=None disables pacing.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        initial_concurrency: Optional[int] = None,
+        max_rate: Optional[float] = None,
+        initial_rate: Optional[float] = None,
+        slow_factor: float = 3.0,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.initial_concurrency = max(1, min(self.max_concurrency, initial_concurrency or self.max_concurrency))
+        self.max_rate = max_rate
+        self.initial_rate = None if max_rate is None else min(max_rate, initial_rate or max_rate)
+        self.slow_factor = slow_factor
+        self._cond = threading.Condition()
+        self._hosts: Dict[str, _HostState] = {}
+
+    def slot(self, url: str) -> _Slot:
+        return _Slot(self, urlsplit(url).netloc.lower())
+
+    def limits(self) -> Dict[str, Tuple[float, Optional[float]]]:
+        """Current (concurrency limit, rate) per host, for progress output."""
+        with self._cond:
+            return {host: (round(s.limit, 2), None if s.rate is None else round(s.rate, 2)) for host, s in self._hosts.items()}
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self)
+        return state
+
+    def _acquire(self, host: str) -> None:
+        with self._cond:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                if state.rate is not None:
+                    state.tokens = min(max(1.0, state.rate), state.tokens + (now - state.refilled_at) * state.rate)
+                    state.refilled_at = now
+                wait_for = [state.blocked_until - now]
+                if state.rate is not None and state.tokens < 1:
+                    wait_for.append((1 - state.tokens) / state.rate)
+                can_run = state.in_flight < int(state.limit)
+                if can_run and max(wait_for) <= 0:
+                    if state.rate is not None:
+                        state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                # Under the limit: sleep until the pause ends / a token is due. At the limit:
+                # sleep until some request on any host is released.
+                self._cond.wait(timeout=max(wait_for) if can_run else None)
+
+    def _release(self, host: str, outcome: str, latency: float, retry_after: Optional[float]) -> None:
+        with self._cond:
+            state = self._state(host)
+            state.in_flight -= 1
+            if outcome == "throttled":
+                now = time.monotonic()
+                # Requests already in flight when the host started refusing all come back
+                # throttled; count them as one congestion event, not one halving each
+                if now - state.decreased_at >= max(DECREASE_WINDOW, state.latency or 0.0):
+                    state.limit = max(1.0, state.limit / 2)
+                    if state.rate is not None:
+                        state.rate = max(0.1, state.rate / 2)
+                    state.decreased_at = now
+                pause = retry_after if retry_after is not None else backoff_delay(1)
+                state.blocked_until = max(state.blocked_until, now + pause)
+                print_info(f"Throttled by {host}: concurrency -> {state.limit:.1f}, pausing {pause:.1f}s")
+            else:
+                failed = outcome == "error"
+                state.error_rate = 0.8 * state.error_rate + 0.2 * (1.0 if failed else 0.0)
+                if not failed:
+                    healthy = state.latency is None or latency <= state.latency * self.slow_factor
+                    state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+                    if healthy and state.error_rate < 0.2:
+                        state.limit = min(float(self.max_concurrency), state.limit + 1 / state.limit)
+                        if state.rate is not None and self.max_rate is not None:
+                            state.rate = min(self.max_rate, state.rate + 1 / max(1.0, state.rate))
+                    elif not healthy:
+                        # Slow responses: back off gently, well before the server starts refusing
+                        state.limit = max(1.0, state.limit * 0.9)
+                elif state.error_rate >= 0.5:
+                    state.limit = max(1.0, state.limit / 2)
+            self._cond.notify_all()
+
+
+class RetryQueue:
+    """
+    Deferred retries: jobs are parked with a due time and handed to `dispatch` (typically a
+    thread-pool submit) when due, so a failed file goes to the back of the line instead of
+    holding a worker through its backoff sleep.
+    """
+
+    def __init__(self, dispatch: Callable[[Callable[[], None]], object]) -> None:
+        self._dispatch = dispatch
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="retry-queue", daemon=True)
+        self._thread.start()
+
+    def push(self, delay: float, job: Callable[[], None]) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + max(0.0, delay), next(self._seq), job))
+            self._cond.notify()
+
+    def __len__(self) -> int:
+        with self._cond:
+            return len(self._heap)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and (not self._heap or self._heap[0][0] > time.monotonic()):
+                    timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                    self._cond.wait(timeout=timeout)
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+            self._dispatch(job)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
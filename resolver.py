@@ -0,0 +1,109 @@
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+import requests
+from requests.utils import requote_uri
+from bs4 import BeautifulSoup
+
+from utils import print_info
+
+
+_PDF_IN_TEXT = re.compile(r"""["']([^"'\s]+?\.pdf)(?:\?[^"'\s]*)?["']""", re.IGNORECASE)
+
+
+def _is_pdf_url(url: Optional[str]) -> bool:
+    return bool(url) and urlsplit(url).path.lower().endswith(".pdf")
+
+
+def pdf_from_query(viewer_url: str) -> Optional[str]:
+    """PDFViewer.aspx?file=<path>.pdf -> absolute URL of <path>.pdf, without any network access."""
+    values = parse_qs(urlsplit(viewer_url).query).get("file") or []
+    for value in values:
+        value = value.strip()
+        if _is_pdf_url(value):
+            # parse_qs unquotes the value; re-quote so it matches the href form the browser reports
+            return requote_uri(urljoin(viewer_url, value))
+    return None
+
+
+def pdf_from_html(viewer_url: str, html: str) -> Optional[str]:
+    """Find the PDF in the viewer page: the .df-ui-download link, a data source attribute, or a .pdf literal in a script."""
+    soup = BeautifulSoup(html, "html.parser")
+    a_tag = soup.select_one(".df-ui-download[href]")
+    if a_tag and _is_pdf_url(urljoin(viewer_url, a_tag["href"])):
+        return urljoin(viewer_url, a_tag["href"])
+    for attr in ("source", "data-source", "data-df-source", "data-pdf", "href", "src"):
+        for tag in soup.select(f"[{attr}]"):
+            candidate = urljoin(viewer_url, tag[attr])
+            if _is_pdf_url(candidate):
+                return candidate
+    for script in soup.find_all("script"):
+        match = _PDF_IN_TEXT.search(script.string or "")
+        if match:
+            return urljoin(viewer_url, match.group(1))
+    return None
+
+
+class ViewerResolver:
+    """
+    Resolve PDFViewer.aspx URLs to direct PDF URLs, cheapest method first:
+    memoized result, the ?file= query, a plain HTTP fetch of the viewer HTML, and only then
+    the caller's Selenium fallback. Successful results are memoized per viewer URL and,
+    when cache_path is set, persisted as JSON so later runs skip resolution entirely.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, session: Optional[requests.Session] = None, timeout: float = 20) -> None:
+        self.cache_path = cache_path
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._cache: Dict[str, str] = {}
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    self._cache = {str(k): str(v) for k, v in json.load(f).items()}
+            except Exception as e:
+                print_info(f"Ignoring unreadable viewer cache {cache_path}: {e}")
+
+    def resolve(self, viewer_url: str, fallback: Optional[Callable[[str], Optional[str]]] = None) -> Optional[str]:
+        with self._lock:
+            cached = self._cache.get(viewer_url)
+        if cached:
+            return cached
+
+        pdf_url = pdf_from_query(viewer_url)
+        if not pdf_url:
+            try:
+                resp = self.session.get(viewer_url, timeout=self.timeout)
+                resp.raise_for_status()
+                pdf_url = pdf_from_html(viewer_url, resp.text)
+            except Exception as e:
+                print_info(f"Viewer fetch failed for {viewer_url}: {e}")
+        if not pdf_url and fallback is not None:
+            pdf_url = fallback(viewer_url)
+
+        if pdf_url:
+            with self._lock:
+                self._cache[viewer_url] = pdf_url
+                self._dirty = True
+        return pdf_url
+
+    def save(self) -> None:
+        if not self.cache_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._cache)
+            self._dirty = False
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,296 @@
+import argparse
+import importlib.util
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from store import INDEX_FILENAME, ContentStore, sha256_file
+from utils import print_info
+
+
+SEARCH_INDEX_FILENAME = "search_index.sqlite"
+DEFAULT_INDEX_WORKERS = os.cpu_count() or 1
+# Extracted documents written per transaction
+COMMIT_EVERY = 50
+# unicode61 folds case and (with remove_diacritics) Latin accents; Arabic letters are kept as word characters
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+def extract_pages(pdf_path: str) -> Tuple[str, List[str], Optional[str]]:
+    """
+    Text of every page of one PDF; runs in a worker process. Returns (path, pages, error).
+    pypdf is optional and imported here, so only indexing runs need it.
+    """
+    try:
+        from pypdf import PdfReader
+
+        reader = PdfReader(pdf_path)
+        return pdf_path, [page.extract_text() or "" for page in reader.pages], None
+    except Exception as e:
+        return pdf_path, [], f"{type(e).__name__}: {e}"
+
+
+def _layout_pdfs(base_dir: str) -> Iterator[Tuple[str, str, str, str]]:
+    """(pdf_path, decade, year, display_num) for every base_dir/decade/year/N.pdf, skipping hidden dirs."""
+    for decade in sorted(os.listdir(base_dir)):
+        decade_dir = os.path.join(base_dir, decade)
+        if decade.startswith(".") or not os.path.isdir(decade_dir):
+            continue
+        for year in sorted(os.listdir(decade_dir)):
+            year_dir = os.path.join(decade_dir, year)
+            if not os.path.isdir(year_dir):
+                continue
+            for name in sorted(os.listdir(year_dir)):
+                if name.lower().endswith(".pdf") and not name.startswith("."):
+                    yield os.path.join(year_dir, name), decade, year, name[:-4]
+
+
+class SearchIndex:
+    """
+    Full-text index of the downloaded gazettes in SQLite FTS5, one row per PDF page, keyed by
+    decade/year/display number. A `docs` table remembers each file's size, mtime and sha256,
+    so update() only extracts files that are new or whose content changed; a file whose
+    content is already indexed under another path (a duplicate) is copied, not re-extracted.
+    """
+
+    def __init__(self, base_dir: str, index_path: Optional[str] = None) -> None:
+        self.base_dir = base_dir
+        self.index_path = index_path or os.path.join(base_dir, SEARCH_INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                path TEXT PRIMARY KEY,
+                decade TEXT NOT NULL,
+                year TEXT NOT NULL,
+                num TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT,
+                page_count INTEGER NOT NULL,
+                error TEXT,
+                indexed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS docs_sha256 ON docs(sha256)")
+        self._db.execute(
+            f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+                body, path UNINDEXED, page UNINDEXED, tokenize = '{FTS_TOKENIZER}'
+            )
+            """
+        )
+        self._db.commit()
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.base_dir))
+
+    def _known(self) -> Dict[str, Tuple[int, int, Optional[str]]]:
+        rows = self._db.execute("SELECT path, size, mtime_ns, sha256 FROM docs").fetchall()
+        return {path: (size, mtime_ns, sha256) for path, size, mtime_ns, sha256 in rows}
+
+    def _content_hashes(self) -> Dict[str, str]:
+        """sha256 per layout path from the download store's index, if there is one (no hashing here)."""
+        if not os.path.exists(os.path.join(self.base_dir, INDEX_FILENAME)):
+            return {}
+        store = ContentStore(self.base_dir)
+        try:
+            return {str(entry["path"]): str(entry["sha256"]) for entry in store.entries()}
+        finally:
+            store.close()
+
+    def _write(
+        self,
+        rel: str,
+        meta: Tuple[str, str, str, int, int, Optional[str]],
+        pages: List[str],
+        error: Optional[str],
+    ) -> None:
+        decade, year, num, size, mtime_ns, sha256 = meta
+        self._db.execute("DELETE FROM pages WHERE path = ?", (rel,))
+        self._db.executemany(
+            "INSERT INTO pages (body, path, page) VALUES (?, ?, ?)",
+            [(text, rel, number) for number, text in enumerate(pages, 1) if text.strip()],
+        )
+        self._db.execute(
+            "INSERT OR REPLACE INTO docs (path, decade, year, num, size, mtime_ns, sha256, page_count, error, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (rel, decade, year, num, size, mtime_ns, sha256, len(pages), error, time.time()),
+        )
+
+    def _copy_from(self, rel: str, source: str, meta: Tuple[str, str, str, int, int, Optional[str]]) -> bool:
+        """Index `rel` with the text already stored for `source`; False if source no longer has that content."""
+        row = self._db.execute("SELECT page_count, error, sha256 FROM docs WHERE path = ?", (source,)).fetchone()
+        if row is None or row[2] != meta[5]:
+            return False
+        pages_total, error, _ = row
+        pages = [""] * pages_total
+        # Blank pages are not stored; keep their slots so page numbers stay right
+        for page, body in self._db.execute("SELECT page, body FROM pages WHERE path = ?", (source,)):
+            pages[int(page) - 1] = body
+        self._write(rel, meta, pages, error)
+        return True
+
+    def update(self, workers: int = DEFAULT_INDEX_WORKERS) -> Dict[str, int]:
+        """
+        Bring the index in line with the download tree: extract new and changed PDFs on a
+        process pool, reuse the text of identical content, drop files that disappeared.
+        Unchanged files (same size and mtime, or same sha256) cost one stat each.
+        Returns counts of indexed, copied, unchanged, removed and failed files.
+        """
+        if importlib.util.find_spec("pypdf") is None:
+            raise RuntimeError("text extraction needs pypdf: pip install pypdf")
+        counts = {"indexed": 0, "copied": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        with self._lock:
+            known = self._known()
+            hashes = self._content_hashes()
+            by_sha = {sha: path for path, (_, _, sha) in known.items() if sha}
+            todo: Dict[str, Tuple[str, Tuple[str, str, str, int, int, Optional[str]]]] = {}
+            # Duplicates of content extracted in this run, copied once their source is written
+            copies: List[Tuple[str, str, Tuple[str, str, str, int, int, Optional[str]]]] = []
+            seen = set()
+
+            for pdf_path, decade, year, num in _layout_pdfs(self.base_dir):
+                rel = self._relpath(pdf_path)
+                seen.add(rel)
+                st = os.stat(pdf_path)
+                previous = known.get(rel)
+                if previous is not None and previous[:2] == (st.st_size, st.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                sha256 = hashes.get(rel) or sha256_file(pdf_path)
+                meta = (decade, year, num, st.st_size, st.st_mtime_ns, sha256)
+                if previous is not None and previous[2] == sha256:
+                    # Same bytes, new inode or mtime (e.g. re-linked by the store): just refresh the stat
+                    self._db.execute(
+                        "UPDATE docs SET size = ?, mtime_ns = ? WHERE path = ?", (st.st_size, st.st_mtime_ns, rel)
+                    )
+                    counts["unchanged"] += 1
+                elif sha256 in by_sha and by_sha[sha256] != rel:
+                    copies.append((rel, by_sha[sha256], meta))
+                else:
+                    todo[pdf_path] = (rel, meta)
+                    by_sha[sha256] = rel
+
+            if todo:
+                print_info(f"Extracting text from {len(todo)} PDFs on {workers} processes...")
+                with ProcessPoolExecutor(max_workers=max(1, workers)) as pool:
+                    chunksize = max(1, min(16, len(todo) // (max(1, workers) * 4)))
+                    done = 0
+                    for pdf_path, pages, error in pool.map(extract_pages, list(todo), chunksize=chunksize):
+                        rel, meta = todo[pdf_path]
+                        self._write(rel, meta, pages, error)
+                        if error:
+                            counts["failed"] += 1
+                            print_info(f"Text extraction failed for {rel}: {error}")
+                        else:
+                            counts["indexed"] += 1
+                        done += 1
+                        if done % COMMIT_EVERY == 0:
+                            self._db.commit()
+
+            for rel, source, meta in copies:
+                if self._copy_from(rel, source, meta):
+                    counts["copied"] += 1
+                    continue
+                # The source changed in the meantime: extract this one after all
+                _, pages, error = extract_pages(os.path.join(self.base_dir, rel))
+                self._write(rel, meta, pages, error)
+                counts["failed" if error else "indexed"] += 1
+
+            for rel in set(known) - seen:
+                self._db.execute("DELETE FROM pages WHERE path = ?", (rel,))
+                self._db.execute("DELETE FROM docs WHERE path = ?", (rel,))
+                counts["removed"] += 1
+            self._db.commit()
+        print_info(
+            f"INDEX {self.base_dir}: {counts['indexed']} indexed, {counts['copied']} copied from duplicates, "
+            f"{counts['unchanged']} unchanged, {counts['removed']} removed, {counts['failed']} failed"
+        )
+        return counts
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        decade: Optional[str] = None,
+        year: Optional[str] = None,
+    ) -> List[Dict[str, object]]:
+        """
+        FTS5 query (words, "phrases", AND/OR/NOT, prefix*), best matches first, one hit per
+        matching page with a highlighted snippet.
+        """
+        sql = (
+            "SELECT d.decade, d.year, d.num, pages.page, snippet(pages, 0, '[', ']', ' ... ', 12), bm25(pages) "
+            "FROM pages JOIN docs d ON d.path = pages.path WHERE pages MATCH ?"
+        )
+        params: List[object] = [query]
+        if decade:
+            sql += " AND d.decade = ?"
+            params.append(decade)
+        if year:
+            sql += " AND d.year = ?"
+            params.append(year)
+        sql += " ORDER BY bm25(pages) LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            dict(zip(("decade", "year", "num", "page", "snippet", "rank"), row))
+            for row in rows
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            docs, failed = self._db.execute("SELECT COUNT(*), COUNT(error) FROM docs").fetchone()
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        return {"docs": docs, "pages": pages, "failed": failed}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Full-text index and search over the downloaded gazettes.")
+    parser.add_argument("base_dir", help="download directory (decade/year/N.pdf)")
+    parser.add_argument("--index", dest="index_path", help=f"index path (default: BASE_DIR/{SEARCH_INDEX_FILENAME})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    update = commands.add_parser("update", help="extract and index new or changed PDFs")
+    update.add_argument("--workers", type=int, default=DEFAULT_INDEX_WORKERS, help="extraction processes")
+    query = commands.add_parser("query", help='search, e.g. \'decree AND "land registry"\'')
+    query.add_argument("query")
+    query.add_argument("--decade")
+    query.add_argument("--year")
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.base_dir, args.index_path)
+    try:
+        if args.command == "update":
+            try:
+                index.update(workers=args.workers)
+            except RuntimeError as e:
+                raise SystemExit(str(e))
+            return
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.query, limit=args.limit, decade=args.decade, year=args.year)
+        except sqlite3.OperationalError as e:
+            raise SystemExit(f"Bad query {args.query!r}: {e}")
+        elapsed = time.perf_counter() - start
+        for hit in hits:
+            print(f"{hit['decade']}/{hit['year']}/{hit['num']} p.{hit['page']}: {hit['snippet']}")
+        print_info(f"{len(hits)} hits in {elapsed * 1000:.1f} ms ({index.stats()['docs']} documents indexed)")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
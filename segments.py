@@ -0,0 +1,153 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Byte ranges are inclusive, as in HTTP: (start, end) covers end - start + 1 bytes
+Range = Tuple[int, int]
+
+# Large issues are fetched as ranges of this many bytes, in parallel, when the server allows it
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+META_FILENAME = "meta.json"
+_PART_NAME = re.compile(r"^(\d{12})-(\d{12})\.part$")
+_CONTENT_RANGE = re.compile(r"^bytes\s+(\d+)-(\d+)/(\d+)$")
+
+
+def parse_content_range(value: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """(start, end, total) from a "bytes a-b/N" Content-Range, or None (e.g. for "bytes */N")."""
+    match = _CONTENT_RANGE.match((value or "").strip())
+    return (int(match.group(1)), int(match.group(2)), int(match.group(3))) if match else None
+
+
+def split_range(start: int, end: int, size: int) -> List[Range]:
+    """Cut start..end into consecutive ranges of at most `size` bytes."""
+    return [(s, min(s + size, end + 1) - 1) for s in range(start, end + 1, size)]
+
+
+class SegmentParts:
+    """
+    The completed byte ranges of one partially downloaded file, kept beside it in a hidden
+    .NAME.parts directory: meta.json (url, total size, ETag, Last-Modified of the version the
+    parts belong to) and one START-END.part file per finished range. Each part is written to a
+    temp file and renamed, so a part on disk is always complete; a later attempt, or a later
+    run, fetches only the ranges that are missing.
+    """
+
+    def __init__(self, pdf_path: str) -> None:
+        directory, name = os.path.split(pdf_path)
+        self.dir = os.path.join(directory, f".{name}.parts")
+        self.meta: Optional[Dict[str, object]] = None
+        try:
+            with open(os.path.join(self.dir, META_FILENAME), "r", encoding="utf-8") as f:
+                self.meta = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @property
+    def size(self) -> Optional[int]:
+        return None if self.meta is None else int(self.meta["size"])
+
+    def validator(self) -> Optional[str]:
+        """The If-Range value for this version: a strong ETag, else Last-Modified."""
+        if self.meta is None:
+            return None
+        etag = self.meta.get("etag")
+        if etag and not str(etag).startswith("W/"):
+            return str(etag)
+        return self.meta.get("last_modified") or None
+
+    def matches(self, url: str, size: int, etag: Optional[str], last_modified: Optional[str]) -> bool:
+        """
+        Whether a response describes the version the saved parts were cut from: same url, same
+        size and a matching validator. Without a validator to compare, nothing matches.
+        """
+        if self.meta is None or self.meta.get("url") != url or self.size != size:
+            return False
+        if self.meta.get("etag") and etag:
+            return self.meta["etag"] == etag
+        if self.meta.get("last_modified") and last_modified:
+            return self.meta["last_modified"] == last_modified
+        return False
+
+    def start(self, url: str, size: int, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Begin collecting parts of this version, discarding parts of any other."""
+        self.clear()
+        os.makedirs(self.dir, exist_ok=True)
+        self.meta = {"url": url, "size": size, "etag": etag, "last_modified": last_modified}
+        self._write(META_FILENAME, [json.dumps(self.meta).encode("utf-8")])
+
+    def done(self) -> List[Range]:
+        """Ranges saved so far, sorted."""
+        if self.meta is None or not os.path.isdir(self.dir):
+            return []
+        ranges = []
+        for name in os.listdir(self.dir):
+            match = _PART_NAME.match(name)
+            if not match:
+                continue
+            start, end = int(match.group(1)), int(match.group(2))
+            if os.path.getsize(os.path.join(self.dir, name)) == end - start + 1:
+                ranges.append((start, end))
+        return sorted(ranges)
+
+    def missing(self, segment_size: int) -> List[Range]:
+        """The gaps between saved ranges, cut into segments of at most segment_size bytes."""
+        if self.meta is None:
+            return []
+        gaps: List[Range] = []
+        position = 0
+        for start, end in self.done():
+            if start > position:
+                gaps.extend(split_range(position, start - 1, segment_size))
+            position = max(position, end + 1)
+        if position < self.size:
+            gaps.extend(split_range(position, self.size - 1, segment_size))
+        return gaps
+
+    def save(self, start: int, end: int, chunks: Iterable[bytes]) -> None:
+        """Write one range from its body chunks; raises IOError, keeping nothing, if it comes up short."""
+        name = f"{start:012d}-{end:012d}.part"
+        written = self._write(name, chunks)
+        if written != end - start + 1:
+            os.remove(os.path.join(self.dir, name))
+            raise IOError(f"incomplete range {start}-{end}: got {written} of {end - start + 1} bytes")
+
+    def read(self, chunk_size: int) -> Iterator[bytes]:
+        """The whole file, in order, from the saved parts; raises IOError if any range is missing."""
+        position = 0
+        for start, end in self.done():
+            if start > position:
+                raise IOError(f"range {position}-{start - 1} missing")
+            with open(os.path.join(self.dir, f"{start:012d}-{end:012d}.part"), "rb") as f:
+                f.seek(position - start)
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    yield chunk
+            position = max(position, end + 1)
+        if self.size is None or position != self.size:
+            raise IOError(f"range {position}-{self.size} missing")
+
+    def clear(self) -> None:
+        self.meta = None
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def _write(self, name: str, chunks: Iterable[bytes]) -> int:
+        fd, tmp_path = tempfile.mkstemp(prefix=".", suffix=".tmp", dir=self.dir)
+        written = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        written += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, os.path.join(self.dir, name))
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return written
@@ -0,0 +1,98 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+# (decade_label, decade_code used in the tile's onclick, years to crawl)
+DEFAULT_DECADES: List[Tuple[str, str, Iterable[int]]] = [
+    ("2000s", "2000", range(2000, 2010)),
+    ("2020s", "2020", range(2020, 2026)),
+]
+
+# (index, count): this machine takes the work items whose hash falls in bucket `index` of `count`
+Shard = Tuple[int, int]
+
+
+def parse_years(spec: str, this_year: Optional[int] = None) -> List[int]:
+    """
+    Years from a comma list of decades ("1960s"), ranges ("2000-2009") and single years
+    ("2023"). Decades stop at the current year. Returns sorted, de-duplicated years.
+    """
+    this_year = datetime.now().year if this_year is None else this_year
+    years = set()
+    for token in (t.strip() for t in spec.split(",")):
+        if not token:
+            continue
+        if token.endswith("s") and token[:-1].isdigit():
+            start = int(token[:-1])
+            if start % 10:
+                raise ValueError(f"not a decade: {token}")
+            years.update(range(start, min(start + 9, this_year) + 1))
+        elif "-" in token:
+            first, _, last = token.partition("-")
+            if not (first.strip().isdigit() and last.strip().isdigit()) or int(first) > int(last):
+                raise ValueError(f"bad year range: {token}")
+            years.update(range(int(first), int(last) + 1))
+        elif token.isdigit():
+            years.add(int(token))
+        else:
+            raise ValueError(f"bad year or decade: {token}")
+    return sorted(years)
+
+
+def decades_for_years(years: Iterable[int]) -> List[Tuple[str, str, List[int]]]:
+    """Group years into the (decade_label, decade_code, years) shape the crawler takes."""
+    by_decade: Dict[int, List[int]] = {}
+    for year in sorted(set(years)):
+        by_decade.setdefault(year // 10 * 10, []).append(year)
+    return [(f"{code}s", str(code), years) for code, years in sorted(by_decade.items())]
+
+
+def parse_shard(spec: str) -> Shard:
+    """"i/n" with 0 <= i < n, e.g. "0/4" .. "3/4"."""
+    index, sep, count = spec.partition("/")
+    if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+        raise ValueError(f"shard must look like i/n: {spec}")
+    shard = (int(index), int(count))
+    if shard[1] < 1 or not 0 <= shard[0] < shard[1]:
+        raise ValueError(f"shard index must be in 0..n-1: {spec}")
+    return shard
+
+
+def in_shard(key: str, shard: Optional[Shard]) -> bool:
+    """Deterministic on every machine and Python version (unlike hash(), which is salted per process)."""
+    if shard is None or shard[1] == 1:
+        return True
+    bucket = int.from_bytes(hashlib.sha1(key.encode("utf-8")).digest()[:8], "big") % shard[1]
+    return bucket == shard[0]
+
+
+def shard_decades(
+    decades: Iterable[Tuple[str, str, Iterable[int]]],
+    shard: Optional[Shard],
+) -> List[Tuple[str, str, List[int]]]:
+    """Keep the years of this shard (crawl work is split by year); decades left empty are dropped."""
+    kept = []
+    for label, code, years in decades:
+        mine = [yr for yr in years if in_shard(f"{label}/{yr}", shard)]
+        if mine:
+            kept.append((label, code, mine))
+    return kept
+
+
+def shard_records(
+    records: Iterable[Tuple[str, str, str, str]],
+    shard: Optional[Shard],
+) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    Keep the (decade, year, display_num, url) records of this shard (download work is split
+    by item). An empty display_num is replaced by the item's 1-based position in its year,
+    the name the downloader would give it, so file names do not depend on which items a
+    shard skips.
+    """
+    positions: Dict[Tuple[str, str], int] = {}
+    for decade, year, display_num, url in records:
+        position = positions[(decade, year)] = positions.get((decade, year), 0) + 1
+        display_num = (display_num or "").strip() or str(position)
+        if in_shard(f"{decade}/{year}/{display_num}", shard):
+            yield decade, year, display_num, url
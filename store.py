@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+from journal import JOURNAL_FILENAME, DownloadJournal
+from utils import print_info
+
+
+OBJECTS_DIRNAME = ".objects"
+INDEX_FILENAME = "content_index.sqlite"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentStore:
+    """
+    Content-addressed storage under base_dir. Each distinct PDF body is kept once as
+    base_dir/.objects/ab/abcdef....pdf and hard-linked into the decade/year/N.pdf layout
+    (copied if the filesystem cannot hard-link). A SQLite index records, per layout path,
+    the source url, size, sha256 and fetch time.
+    """
+
+    def __init__(self, base_dir: str, index_path: Optional[str] = None) -> None:
+        self.base_dir = base_dir
+        self.objects_dir = os.path.join(base_dir, OBJECTS_DIRNAME)
+        self.index_path = index_path or os.path.join(base_dir, INDEX_FILENAME)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                url TEXT,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+            """
+        )
+        # HTTP validators for conditional revalidation (added after the first schema)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(files)")}
+        for name, decl in (("etag", "TEXT"), ("last_modified", "TEXT"), ("checked_at", "REAL")):
+            if name not in columns:
+                self._db.execute(f"ALTER TABLE files ADD COLUMN {name} {decl}")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_sha256 ON files(sha256)")
+        self._db.commit()
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, sha256[:2], f"{sha256}.pdf")
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.base_dir))
+
+    def commit(
+        self,
+        tmp_path: str,
+        pdf_path: str,
+        url: Optional[str],
+        size: int,
+        sha256: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> bool:
+        """
+        Move a verified temp file into the store and atomically place it at pdf_path.
+        Returns True when the content was already stored (a duplicate), in which case
+        tmp_path is discarded and pdf_path becomes another link to the existing object.
+        When this replaces a different version of pdf_path, the old object is deleted once
+        no indexed file refers to it any more.
+        """
+        previous = self.lookup(pdf_path)
+        obj = self.object_path(sha256)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        with self._lock:
+            duplicate = os.path.exists(obj)
+            if duplicate:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, obj)
+        self._link(obj, pdf_path)
+        self.record(pdf_path, url, size, sha256, etag=etag, last_modified=last_modified)
+        if previous is not None and previous["sha256"] != sha256:
+            self._drop_unreferenced(str(previous["sha256"]))
+        return duplicate
+
+    def _drop_unreferenced(self, sha256: str) -> None:
+        """Delete a stored object that no index row and no layout hard link refers to."""
+        obj = self.object_path(sha256)
+        with self._lock:
+            referenced = self._db.execute("SELECT 1 FROM files WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+            try:
+                if not referenced and os.stat(obj).st_nlink <= 1:
+                    os.remove(obj)
+            except OSError:
+                pass
+
+    def _link(self, obj: str, pdf_path: str) -> None:
+        if os.path.exists(pdf_path) and os.path.samefile(obj, pdf_path):
+            # Already this object; renaming a second link onto it would be a no-op that leaves the link behind
+            return
+        directory, name = os.path.split(pdf_path)
+        link_tmp = os.path.join(directory, f".{name}.{os.getpid()}.{threading.get_ident()}.link")
+        try:
+            os.link(obj, link_tmp)
+        except OSError:
+            # No hard links here (other device, FAT, ...): fall back to a private copy
+            fd, link_tmp = tempfile.mkstemp(prefix=f".{name}.", suffix=".link", dir=directory or ".")
+            os.close(fd)
+            shutil.copyfile(obj, link_tmp)
+        os.replace(link_tmp, pdf_path)
+        if os.path.lexists(link_tmp):
+            os.remove(link_tmp)
+
+    def record(
+        self,
+        pdf_path: str,
+        url: Optional[str],
+        size: int,
+        sha256: str,
+        fetched_at: Optional[float] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files (path, url, size, sha256, fetched_at, etag, last_modified, checked_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._relpath(pdf_path), url, size, sha256, now if fetched_at is None else fetched_at, etag, last_modified, now),
+            )
+            self._db.commit()
+
+    def mark_checked(self, pdf_path: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Record a successful freshness check; newly learned validators replace missing ones."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE files SET checked_at = ?, etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified)"
+                " WHERE path = ?",
+                (time.time(), etag, last_modified, self._relpath(pdf_path)),
+            )
+            self._db.commit()
+
+    def set_url(self, pdf_path: str, url: str) -> None:
+        """Fill in the source url of a file indexed without one (e.g. adopted by an audit)."""
+        with self._lock:
+            self._db.execute("UPDATE files SET url = ? WHERE path = ? AND url IS NULL", (url, self._relpath(pdf_path)))
+            self._db.commit()
+
+    def entries(self) -> List[Dict[str, object]]:
+        """Every indexed file, with pdf_path resolved against base_dir."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, url, size, sha256, etag, last_modified FROM files ORDER BY path"
+            ).fetchall()
+        return [
+            dict(zip(("path", "url", "size", "sha256", "etag", "last_modified"), row),
+                 pdf_path=os.path.join(self.base_dir, row[0]))
+            for row in rows
+        ]
+
+    def lookup(self, pdf_path: str) -> Optional[Dict[str, object]]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path, url, size, sha256, fetched_at FROM files WHERE path = ?", (self._relpath(pdf_path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("path", "url", "size", "sha256", "fetched_at"), row))
+
+    def adopt(self, pdf_path: str, url: Optional[str] = None) -> bool:
+        """Bring a file downloaded before the store existed into it (hash, dedupe, index)."""
+        sha256 = sha256_file(pdf_path)
+        size = os.path.getsize(pdf_path)
+        obj = self.object_path(sha256)
+        os.makedirs(os.path.dirname(obj), exist_ok=True)
+        with self._lock:
+            duplicate = os.path.exists(obj)
+            if not duplicate:
+                if _can_link(pdf_path, obj):
+                    os.link(pdf_path, obj)
+                else:
+                    shutil.copyfile(pdf_path, obj)
+        if duplicate and not os.path.samefile(obj, pdf_path):
+            self._link(obj, pdf_path)
+        self.record(pdf_path, url, size, sha256, os.path.getmtime(pdf_path))
+        return duplicate
+
+    def _journal_url(self, journal: Optional[DownloadJournal], rel: str) -> Optional[str]:
+        """The url the download journal has for base_dir-relative decade/year/N.pdf, if any."""
+        parts = rel.split(os.sep)
+        if journal is None or len(parts) != 3:
+            return None
+        entry = journal.entry((parts[0], parts[1], parts[2]))
+        url = entry.get("url") if entry else None
+        return str(url) if url and str(url).lower().endswith(".pdf") else None
+
+    def audit(
+        self, deep: bool = False, fix: bool = False, journal: Optional[DownloadJournal] = None,
+    ) -> Dict[str, List[str]]:
+        """
+        Check the layout against the index without re-downloading anything.
+        The fast check compares existence, size and that the file is the stored object
+        (same inode, or same size for copies); deep=True also re-hashes every file.
+        fix=True adopts untracked PDFs into the store, with their url from `journal` when it
+        has one, and fills in journal urls of indexed files that have none.
+        Stored objects no indexed file refers to (left by versions replaced before commit()
+        cleaned them up) are reported as orphaned; fix=True deletes them. So are the hidden
+        .N.pdf.*.link files an interrupted or no-op link left in the layout, which also keep
+        replaced objects alive.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT path, size, sha256, url FROM files").fetchall()
+        problems: Dict[str, List[str]] = {
+            "missing": [], "size_mismatch": [], "hash_mismatch": [], "untracked": [], "stray_links": [],
+            "orphaned": [],
+        }
+        indexed = set()
+        for rel, size, sha256, url in rows:
+            indexed.add(rel)
+            path = os.path.join(self.base_dir, rel)
+            if fix and not url and self._journal_url(journal, rel):
+                self.set_url(path, self._journal_url(journal, rel))
+            if not os.path.exists(path):
+                problems["missing"].append(rel)
+                continue
+            if os.path.getsize(path) != size:
+                problems["size_mismatch"].append(rel)
+                continue
+            obj = self.object_path(sha256)
+            linked = os.path.exists(obj) and os.path.samefile(obj, path)
+            if (deep or not linked) and sha256_file(path) != sha256:
+                problems["hash_mismatch"].append(rel)
+
+        for root, dirs, files in os.walk(self.base_dir):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if name.startswith(".") and name.endswith(".link"):
+                    problems["stray_links"].append(self._relpath(os.path.join(root, name)))
+                    if fix:
+                        os.remove(os.path.join(root, name))
+                    continue
+                if not name.lower().endswith(".pdf"):
+                    continue
+                rel = self._relpath(os.path.join(root, name))
+                if rel not in indexed:
+                    if fix:
+                        self.adopt(os.path.join(root, name), self._journal_url(journal, rel))
+                    problems["untracked"].append(rel)
+
+        with self._lock:
+            referenced = {row[0] for row in self._db.execute("SELECT DISTINCT sha256 FROM files")}
+        for root, _, files in os.walk(self.objects_dir):
+            for name in files:
+                if name.endswith(".pdf") and name[:-4] not in referenced:
+                    problems["orphaned"].append(self._relpath(os.path.join(root, name)))
+                    if fix:
+                        self._drop_unreferenced(name[:-4])
+        return problems
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            files, unique, total = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha256), COALESCE(SUM(size), 0) FROM files"
+            ).fetchone()
+            stored = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM files GROUP BY sha256)"
+            ).fetchone()[0]
+        return {"files": files, "unique": unique, "bytes": total, "stored_bytes": stored}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def _can_link(src: str, dst: str) -> bool:
+    try:
+        return os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev
+    except OSError:
+        return False
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audit a downloaded gazette tree against its content index.")
+    parser.add_argument("base_dir")
+    parser.add_argument("--deep", action="store_true", help="re-hash every file instead of the fast inode/size check")
+    parser.add_argument("--fix", action="store_true", help="adopt untracked PDFs into the store, delete orphaned objects")
+    args = parser.parse_args()
+
+    store = ContentStore(args.base_dir)
+    # The journal knows the source url of files downloaded before the store existed
+    journal = DownloadJournal(args.base_dir) if os.path.exists(os.path.join(args.base_dir, JOURNAL_FILENAME)) else None
+    report = store.audit(deep=args.deep, fix=args.fix, journal=journal)
+    if journal is not None:
+        journal.close()
+    for kind, paths in report.items():
+        for rel in paths:
+            print_info(f"{kind.upper()}: {rel}")
+    stats = store.stats()
+    print_info(
+        f"AUDIT {args.base_dir}: {stats['files']} files, {stats['unique']} unique, "
+        f"{stats['bytes'] - stats['stored_bytes']} bytes saved by deduplication; "
+        + ", ".join(f"{len(v)} {k}" for k, v in report.items())
+    )
+    store.close()
@@ -0,0 +1,73 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from metrics import CRAWL_STEP_SECONDS, Metrics
+from utils import print_info
+
+
+class StepTimer:
+    """
+    Thread-safe wall-clock profile of named steps, grouped by a key (e.g. "2000s/2003").
+    Use `with timer.step(key, "year_click"): ...`; a step may run many times per key
+    (e.g. one "viewer_resolution" per card) and its durations are summed.
+    With `metrics`, every step is also observed into the CRAWL_STEP_SECONDS histogram.
+    """
+
+    def __init__(self, metrics: Optional[Metrics] = None) -> None:
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Dict[str, List[float]]] = {}
+
+    @contextmanager
+    def step(self, key: str, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(key, name, time.perf_counter() - start)
+
+    def add(self, key: str, name: str, seconds: float) -> None:
+        with self._lock:
+            self._durations.setdefault(key, {}).setdefault(name, []).append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe(CRAWL_STEP_SECONDS, seconds, step=name)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """{key: {step: {"total": s, "count": n, "max": s}}} plus a "__all__" key summed over keys."""
+        with self._lock:
+            snapshot = {k: {n: list(v) for n, v in steps.items()} for k, steps in self._durations.items()}
+        out: Dict[str, Dict[str, Dict[str, float]]] = {}
+        overall: Dict[str, List[float]] = {}
+        for key, steps in snapshot.items():
+            out[key] = {}
+            for name, values in steps.items():
+                out[key][name] = {"total": round(sum(values), 3), "count": len(values), "max": round(max(values), 3)}
+                overall.setdefault(name, []).extend(values)
+        out["__all__"] = {
+            name: {"total": round(sum(v), 3), "count": len(v), "max": round(max(v), 3)} for name, v in overall.items()
+        }
+        return out
+
+    def report(self) -> str:
+        summary = self.summary()
+        overall = summary.pop("__all__")
+        names = sorted(overall, key=lambda n: -overall[n]["total"])
+        lines = ["key".ljust(14) + "".join(n.rjust(20) for n in names)]
+        for key in sorted(summary):
+            row = key.ljust(14)
+            for name in names:
+                stats = summary[key].get(name)
+                row += (f"{stats['total']:.2f}s/{stats['count']}" if stats else "-").rjust(20)
+            lines.append(row)
+        lines.append("TOTAL".ljust(14) + "".join(f"{overall[n]['total']:.2f}s/{overall[n]['count']}".rjust(20) for n in names))
+        return "\n".join(lines)
+
+    def write_report(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print_info(f"Timing report written to {path}")
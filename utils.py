@@ -1,4 +1,11 @@
+import json
 import re
+import time
+
+
+# "text": "[INFO] message" lines; "json": one {"ts", "level", "msg"} object per line, for log shippers
+LOG_FORMATS = ("text", "json")
+_log_format = "text"
 
 
 def sanitize_filename(name: str) -> str:
@@ -19,5 +26,15 @@ def sanitize_filename(name: str) -> str:
     return name
 
 
+def set_log_format(log_format: str) -> None:
+    global _log_format
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"unknown log format: {log_format}")
+    _log_format = log_format
+
+
 def print_info(message: str) -> None:
-    print(f"[INFO] {message}")
+    if _log_format == "json":
+        print(json.dumps({"ts": round(time.time(), 3), "level": "info", "msg": message}, ensure_ascii=False))
+    else:
+        print(f"[INFO] {message}")